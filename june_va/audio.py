@@ -3,34 +3,451 @@ This module provides classes and functions for recording and playing audio.
 """
 
 import logging
-from typing import Dict, List, Optional, Union
+import math
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Union
 
 import numpy as np
-import pygame.mixer
+from colorama import Fore
 
 from .utils import print_system_message, suppress_stdout_stderr
+from .vad import create_vad
+
+
+def to_pcm16(samples: Union[Sequence[float], np.ndarray], normalize: bool = True) -> np.ndarray:
+    """
+    Convert floating point audio samples to 16-bit PCM.
+
+    The normalization mirrors the one Coqui TTS applies when writing WAV files, so in-memory playback sounds the same
+    as the previous file-based playback. Samples are scaled and converted in a single pass, without temporary arrays
+    when they are already a float32 array.
+
+    Args:
+        samples: The audio samples, nominally in the range [-1, 1].
+        normalize: Whether to scale the samples to their peak, or to clip them to the nominal range otherwise.
+
+    Returns:
+        A contiguous array of int16 samples.
+    """
+    wav = np.asarray(samples, dtype=np.float32)
+    pcm = np.empty(wav.shape, dtype=np.int16)
+
+    if not wav.size:
+        return pcm
+
+    if normalize:
+        peak = max(0.01, float(wav.max()), -float(wav.min()))
+    else:
+        peak = 1.0
+        wav = np.clip(wav, -1.0, 1.0)
+
+    np.multiply(wav, np.iinfo(np.int16).max / peak, out=pcm, casting="unsafe")
+
+    return pcm
+
+
+@lru_cache(maxsize=8)
+def _polyphase_filter(up: int, down: int, half_taps: int) -> np.ndarray:
+    """
+    Design the anti-aliasing filter of a rational resampler and split it into its phases.
+
+    The filter is a Kaiser-windowed sinc with its cutoff at the lower of the two Nyquist frequencies, as in
+    `scipy.signal.resample_poly`.
+
+    Args:
+        up: The upsampling factor.
+        down: The downsampling factor.
+        half_taps: The half length of the filter, in samples at the lower of the two rates.
+
+    Returns:
+        An array of shape (up, taps) whose row `p` holds the taps applied to the input for output phase `p`.
+    """
+    rate = max(up, down)
+    half_length = half_taps * rate
+    positions = np.arange(-half_length, half_length + 1)
+
+    taps = np.sinc(positions / rate) * np.kaiser(len(positions), 5.0)
+    taps *= up / taps.sum()
+
+    phases = np.zeros(up * math.ceil(len(taps) / up), dtype=np.float32)
+    phases[: len(taps)] = taps
+
+    return phases.reshape(-1, up).T.copy()
+
+
+class AudioPreprocessor:
+    """
+    Turns captured 16-bit PCM into the float32 audio Speech-to-Text models expect, one chunk at a time.
+
+    Every chunk is converted to float32, its DC offset is removed by a one-pole high-pass filter and it is resampled
+    with a polyphase filter designed once per rate pair, all in vectorized NumPy as the audio arrives, so an utterance
+    is ready for transcription as soon as it ends. Both filters carry their state from one chunk to the next, so the
+    output does not depend on how the input is split into chunks. Gain normalization needs the peak of the whole
+    utterance, which is tracked chunk by chunk; the finished utterance is scaled into a new array, so that views of the
+    unscaled samples stay valid. The output is written to a growable buffer that is reused for every utterance.
+
+    Args:
+        input_rate: The sample rate of the captured audio.
+        output_rate: The sample rate of the processed audio (default: 16000, the rate of Whisper models).
+        target_peak: The peak level finished utterances are scaled to, or None to keep their level (default: 0.9).
+        max_gain: The maximum gain, so that near-silent utterances are not amplified into noise (default: 10).
+        dc_time_constant_ms: The time constant of the DC offset estimate, in milliseconds (default: 500).
+        half_taps: The half length of the resampling filter, in samples at the lower rate (default: 10).
+
+    Attributes:
+        input_rate: The sample rate of the captured audio.
+        output_rate: The sample rate of the processed audio.
+        target_peak: The peak level finished utterances are scaled to, if any.
+        max_gain: The maximum gain.
+        peak: The peak level of the current utterance so far.
+    """
+
+    def __init__(
+        self,
+        input_rate: int,
+        output_rate: int = 16000,
+        target_peak: Optional[float] = 0.9,
+        max_gain: float = 10.0,
+        dc_time_constant_ms: float = 500.0,
+        half_taps: int = 10,
+    ) -> None:
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.target_peak = target_peak
+        self.max_gain = max_gain
+
+        divisor = math.gcd(input_rate, output_rate)
+        self._up = output_rate // divisor
+        self._down = input_rate // divisor
+        self._delay = half_taps * max(self._up, self._down)
+        self._phases = _polyphase_filter(self._up, self._down, half_taps)
+        # The DC offset estimate follows `dc += rate * (sample - dc)` for every sample. Over a block, it is
+        # `dc[n] = decay^(n + 1) * (dc[-1] + rate * sum(sample[k] / decay^(k + 1) for k <= n))`.
+        self._dc_rate = 1 - math.exp(-1000 / (input_rate * dc_time_constant_ms))
+        self._dc_powers = (1 - self._dc_rate) ** np.arange(1, 1025, dtype=np.float64)
+        self._output = np.zeros(output_rate * 10, dtype=np.float32)
+
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Start a new utterance. Views returned for the previous one are overwritten from now on.
+        """
+        self.peak = 0.0
+        self._dc = 0.0
+        self._history = np.zeros(self._phases.shape[1] - 1, dtype=np.float32)
+        self._received = 0
+        self._produced = 0
+
+    def _remove_dc(self, samples: np.ndarray) -> None:
+        """
+        Subtract the DC offset estimate from a chunk in place, updating the estimate sample by sample.
+
+        Args:
+            samples: The float32 input samples.
+        """
+        block_size = len(self._dc_powers)
+
+        for start in range(0, len(samples), block_size):
+            block = samples[start : start + block_size]
+            powers = self._dc_powers[: len(block)]
+            dc = powers * (self._dc + self._dc_rate * np.cumsum(block / powers))
+            self._dc = float(dc[-1])
+            block -= dc
+
+    def _resample(self, samples: np.ndarray, final: bool = False) -> np.ndarray:
+        """
+        Resample a chunk, keeping the tail of the input needed for the next one.
+
+        Args:
+            samples: The float32 input samples.
+            final: Whether the chunk ends the input, which is then taken to be followed by silence.
+
+        Returns:
+            Every output sample whose input is complete, or every remaining output sample if the chunk is final.
+        """
+        if self._up == self._down:
+            return samples
+
+        taps = self._phases.shape[1]
+        history = np.concatenate((self._history, samples))
+        origin = self._received - len(self._history)
+        self._received += len(samples)
+
+        if final:
+            # Every input sample at `m * down / up` gets its output `m`, whose later inputs are zeros
+            end = -(-self._up * self._received // self._down)
+            history = np.concatenate((history, np.zeros(taps, dtype=np.float32)))
+        else:
+            # Output `m` is centered on input `(m * down + delay) / up`, so it is complete once that input has arrived
+            end = (self._up * self._received - 1 - self._delay) // self._down + 1
+
+        positions = np.arange(self._produced, max(self._produced, end)) * self._down + self._delay
+        self._produced += len(positions)
+
+        inputs = history[(positions // self._up - origin)[:, np.newaxis] - np.arange(taps)]
+        resampled = np.einsum("mk,mk->m", inputs, self._phases[positions % self._up])
+
+        self._history = history[len(history) - taps + 1 :]
+
+        return resampled.astype(np.float32, copy=False)
+
+    def process(self, pcm: np.ndarray) -> np.ndarray:
+        """
+        Preprocess a chunk of captured audio and append it to the utterance.
+
+        Args:
+            pcm: Mono int16 PCM samples at the input rate.
+
+        Returns:
+            A view of the float32 samples at the output rate the chunk completed, valid until the next `reset`.
+        """
+        if not len(pcm):
+            return self._output[:0]
+
+        samples = pcm.astype(np.float32)
+        samples *= 1 / np.iinfo(np.int16).max
+
+        self._remove_dc(samples)
+
+        if self._up == self._down:
+            self._produced += len(samples)
+
+        return self._append(self._resample(samples))
+
+    def _append(self, resampled: np.ndarray) -> np.ndarray:
+        """
+        Write resampled samples to the end of the utterance, growing the buffer if needed.
+
+        Args:
+            resampled: The float32 samples at the output rate, already counted in `_produced`.
+
+        Returns:
+            A view of the samples in the buffer.
+        """
+        self.peak = max(self.peak, float(np.max(np.abs(resampled), initial=0.0)))
+
+        start = self._produced - len(resampled)
+
+        if self._produced > len(self._output):
+            output = np.zeros(max(self._produced, 2 * len(self._output)), dtype=np.float32)
+            output[:start] = self._output[:start]
+            self._output = output
+
+        self._output[start : self._produced] = resampled
+
+        return self._output[start : self._produced]
+
+    def finish(self, length: Optional[int] = None) -> np.ndarray:
+        """
+        Complete the utterance, resampling the end of the input, and normalize its gain.
+
+        Args:
+            length: The number of input samples to keep, such as to drop trailing silence, or None to keep them all.
+
+        Returns:
+            A new array of the float32 samples of the utterance at the output rate.
+        """
+        self._append(self._resample(np.zeros(0, dtype=np.float32), final=True))
+
+        count = self._produced if length is None else min(self._produced, -(-length * self._up // self._down))
+        samples = self._output[:count].copy()
+
+        if self.target_peak and self.peak > 0:
+            samples *= min(self.max_gain, self.target_peak / self.peak)
+
+        return samples
+
+
+class _PlaybackSegment:
+    """
+    A block of PCM samples queued for playback, along with the callbacks to run once it has been played.
+
+    A segment can be queued before all of its samples are known, and be extended while it is being played. Its
+    samples are then written to the free tail of a growable buffer, and only `length` changes while it is played.
+
+    Args:
+        samples: Mono int16 PCM samples.
+        is_complete: Whether the segment holds all of its samples.
+        length: The number of valid samples at the start of `samples` (default: all of them).
+
+    Attributes:
+        samples: The buffer holding the PCM samples of the segment.
+        length: The number of valid samples in the buffer.
+        offset: The number of samples already handed to the output device.
+        is_complete: Whether the segment holds all of its samples. An incomplete segment stays at the head of the
+            buffer when it runs out of samples, and the output device plays silence until more arrive.
+        is_dropped: Whether the segment was removed from the buffer by `AudioIO.stop_playback`.
+        on_started: Callbacks to invoke when the first sample of the segment is handed to the output device.
+        on_finished: Callbacks to invoke when the last sample of the segment has been played.
+    """
+
+    def __init__(self, samples: np.ndarray, is_complete: bool = True, length: Optional[int] = None) -> None:
+        self.samples = samples
+        self.length = len(samples) if length is None else length
+        self.offset = 0
+        self.is_complete = is_complete
+        self.is_dropped = False
+        self.on_started: List[Callable[[], None]] = []
+        self.on_finished: List[Callable[[], None]] = []
+
+    @property
+    def remaining(self) -> int:
+        """
+        The number of samples not yet handed to the output device.
+        """
+        return self.length - self.offset
+
+
+class _CaptureBuffer:
+    """
+    A growable buffer of the int16 samples captured by the input stream callback.
+
+    Samples are addressed by their position in the capture. The callback copies every block it receives straight into
+    preallocated storage, which doubles in size when full, and readers get views of the storage rather than copies.
+    Samples before a position can be discarded; the remaining ones are moved back to the start of the storage once
+    the discarded ones take up half of it, so while waiting for speech the buffer works as a ring holding little more
+    than the pre-roll. Views remain valid until samples are next discarded.
+
+    Args:
+        capacity: The initial number of samples the storage holds.
+
+    Attributes:
+        start: The position of the oldest sample kept.
+        end: The position following the newest sample.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._samples = np.zeros(capacity, dtype=np.int16)
+        self._condition = threading.Condition()
+        self.start = 0
+        self.end = 0
+
+    def write(self, data: bytes) -> None:
+        """
+        Append a block of captured samples, growing the storage if needed.
+
+        Args:
+            data: Mono int16 PCM samples as delivered by PortAudio.
+        """
+        block = np.frombuffer(data, dtype=np.int16)
+
+        with self._condition:
+            used = self.end - self.start
+
+            if used + len(block) > len(self._samples):
+                samples = np.empty(max(2 * len(self._samples), used + len(block)), dtype=np.int16)
+                samples[:used] = self._samples[:used]
+                self._samples = samples
+
+            self._samples[used : used + len(block)] = block
+            self.end += len(block)
+            self._condition.notify_all()
+
+    def read(self, position: int, count: int, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        Wait for samples to be captured and return a view of them.
+
+        Args:
+            position: The position of the first sample.
+            count: The number of samples.
+            timeout: The maximum number of seconds to wait, or None to wait indefinitely.
+
+        Returns:
+            A view of the samples, or None if the wait timed out.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.end >= position + count, timeout):
+                return None
+
+            return self._samples[position - self.start : position + count - self.start]
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        """
+        Return a view of captured samples.
+
+        Args:
+            start: The position of the first sample, no earlier than `start`.
+            end: The position following the last sample, no later than `end`.
+
+        Returns:
+            A view of the samples.
+        """
+        with self._condition:
+            return self._samples[start - self.start : end - self.start]
+
+    def discard(self, position: int) -> None:
+        """
+        Drop the samples before a position.
+
+        Args:
+            position: The position of the oldest sample to keep.
+        """
+        with self._condition:
+            position = min(max(position, self.start), self.end)
+            dropped = position - self.start
+
+            if dropped * 2 < len(self._samples):
+                return
+
+            used = self.end - position
+            self._samples[:used] = self._samples[dropped : dropped + used]
+            self.start = position
+
+    def clear(self) -> None:
+        """
+        Drop all captured samples.
+        """
+        with self._condition:
+            self.start = self.end
 
 
 class AudioIO:
     """
     A class for recording and playing audio using PyAudio and Pygame.
 
-    This class provides methods for initializing an input audio stream, recording audio,
-    detecting silence in audio data, and playing WAV files using Pygame.
+    This class provides methods for initializing input and output audio streams, recording speech delimited by a
+    voice activity detector, playing in-memory PCM buffers, and playing WAV files using Pygame.
+
+    Microphone input is captured by a callback-driven stream into a growable int16 buffer, and recorded frames are
+    preprocessed for Speech-to-Text by an `AudioPreprocessor` as they are read, so a long utterance is not copied
+    frame by frame and is ready for transcription as soon as it ends.
+
+    Args:
+        vad: Optional voice activity detection settings: 'backend' (see `vad.VAD_BACKENDS`, default: 'energy'),
+            'frame_ms' (default: 30), 'pre_roll_ms' (default: 300), 'hangover_ms' (default: 500), 'min_speech_ms'
+            (default: 90), 'max_utterance_ms' (default: 30000), plus any backend specific options.
+        barge_in: Optional settings for listening while audio is played: 'enabled' (default: False),
+            'min_speech_ms' (default: 300) and 'vad' with detector options overriding those of `vad`. Speaker echo
+            reaches the microphone too, so barge-in works best with headphones or a stricter detector.
+        preprocessing: Optional keyword arguments for the `AudioPreprocessor` of recordings.
+        output_buffer_size: The number of samples per output device buffer (default: `CHUNK`). Smaller buffers lower
+            the latency of streamed audio at the risk of underruns.
 
     Attributes:
-        RATE: The sample rate for audio recording and playback (default: 24000).
-        CHUNK: The buffer size for audio recording (default: 2048).
-        THRESHOLD: The threshold for detecting silence in audio data (default: 800).
-        SILENCE_LIMIT: The number of seconds of silence before stopping recording (default: 3).
+        RATE: The sample rate for audio recording (default: 24000).
+        CHUNK: The default buffer size for audio playback (default: 2048).
+        frame_size: The number of samples per captured frame classified by the VAD.
+        pre_roll_frames: The number of frames kept from before speech onset so the first syllable is not clipped.
+        hangover_frames: The number of consecutive non-speech frames that end an utterance.
+        min_speech_frames: The number of consecutive speech frames required to start recording.
+        max_utterance_frames: The number of recorded frames after which an utterance ends even without silence.
+        vad: The voice activity detector.
+        is_barge_in_enabled: A flag indicating whether the microphone is monitored during playback.
+        barge_in_speech_frames: The number of consecutive speech frames that interrupt playback.
+        barge_in_frames: The frames captured when speech interrupted playback, used to start the next recording.
         pa: An instance of the PyAudio object.
         input_stream: The input audio stream for recording.
+        output_stream: The callback-driven output audio stream for PCM playback.
+        output_sample_rate: The sample rate the output stream was opened with.
+        output_buffer_size: The number of samples per output device buffer.
+        preprocessor: The preprocessor turning recorded frames into Speech-to-Text input.
     """
 
     RATE = 24000
     CHUNK = 2048
-    THRESHOLD = 2000
-    SILENCE_LIMIT = 3
 
     def __enter__(self) -> "AudioIO":
         """
@@ -44,53 +461,422 @@ class AudioIO:
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         """
         This method is called when the context manager is exited.
-        It closes the audio input stream and terminates the PyAudio instance.
+        It closes the audio streams and terminates the PyAudio instance.
         """
         self.close()
 
-    def __init__(self) -> None:
-        self.pa = None
-        self.input_stream = None
-
-    def _initialize_input_stream(self) -> None:
+    def __init__(
+        self,
+        vad: Optional[Dict[str, Any]] = None,
+        barge_in: Optional[Dict[str, Any]] = None,
+        preprocessing: Optional[Dict[str, Any]] = None,
+        output_buffer_size: Optional[int] = None,
+    ) -> None:
+        vad_config = dict(vad or {})
+        frame_ms: int = vad_config.pop("frame_ms", 30)
+
+        self.frame_size = self.RATE * frame_ms // 1000
+        self.pre_roll_frames = max(0, vad_config.pop("pre_roll_ms", 300) // frame_ms)
+        self.hangover_frames = max(1, vad_config.pop("hangover_ms", 500) // frame_ms)
+        self.min_speech_frames = max(1, vad_config.pop("min_speech_ms", 90) // frame_ms)
+        self.max_utterance_frames = max(1, vad_config.pop("max_utterance_ms", 30000) // frame_ms)
+        self.vad = create_vad(self.RATE, **vad_config)
+
+        barge_in_config = barge_in or {}
+        self.is_barge_in_enabled = bool(barge_in_config.get("enabled"))
+        self.barge_in_speech_frames = max(1, barge_in_config.get("min_speech_ms", 300) // frame_ms)
+        self.barge_in_frames: List[np.ndarray] = []
+        self._barge_in_vad_config = {**vad_config, **(barge_in_config.get("vad") or {})}
+        self._monitor: Optional[threading.Thread] = None
+        self._monitor_stop = threading.Event()
+
+        # The PyAudio objects are typed loosely, as pyaudio is only imported once a stream is opened
+        self.pa: Any = None
+        self.input_stream: Any = None
+        self._capture = _CaptureBuffer(self.RATE * 10)
+        self._read_position = 0
+        self.preprocessor = AudioPreprocessor(self.RATE, **(preprocessing or {}))
+        self.output_stream: Any = None
+        self.output_sample_rate: Optional[int] = None
+        self.output_buffer_size = output_buffer_size or self.CHUNK
+        self._playback_buffer: Deque[_PlaybackSegment] = deque()
+        self._playback_lock = threading.Lock()
+        self._playback_condition = threading.Condition(self._playback_lock)
+
+    def _initialize_pa(self) -> None:
         """
-        Initialize the input audio stream using PyAudio.
+        Create the PyAudio instance if it does not exist yet.
         """
+        if self.pa:
+            return
+
         import pyaudio
 
         with suppress_stdout_stderr():
             self.pa = pyaudio.PyAudio()
 
+    def _initialize_input_stream(self) -> None:
+        """
+        Initialize a callback-driven input audio stream using PyAudio. The stream is started by its readers.
+        """
+        import pyaudio
+
+        self._initialize_pa()
+
         self.input_stream = self.pa.open(
             channels=1,
             format=pyaudio.paInt16,
-            frames_per_buffer=self.CHUNK,
+            frames_per_buffer=self.frame_size,
             input=True,
             rate=self.RATE,
+            start=False,
+            stream_callback=self._input_callback,
         )
 
+    def _input_callback(self, in_data, _frame_count, _time_info, _status):
+        """
+        Append captured samples to the capture buffer.
+
+        This method is invoked by PortAudio on its own thread.
+        """
+        import pyaudio
+
+        self._capture.write(in_data)
+
+        return None, pyaudio.paContinue
+
+    def _start_capture(self) -> None:
+        """
+        Start the input stream if it is not running, discarding whatever was captured before.
+        """
+        if not self.input_stream:
+            self._initialize_input_stream()
+
+        if not self.input_stream.is_active():
+            self._capture.clear()
+            self._read_position = self._capture.end
+            self.input_stream.start_stream()
+
+    def _read_frame(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        Wait for the next frame of captured audio.
+
+        Args:
+            timeout: The maximum number of seconds to wait, or None to wait indefinitely.
+
+        Returns:
+            A view of the int16 samples of the frame, or None if the wait timed out.
+        """
+        frame = self._capture.read(self._read_position, self.frame_size, timeout)
+
+        if frame is not None:
+            self._read_position += self.frame_size
+
+        return frame
+
+    def _initialize_output_stream(self, sample_rate: int) -> None:
+        """
+        Initialize a callback-driven output audio stream using PyAudio.
+
+        Args:
+            sample_rate: The sample rate of the PCM data that will be played.
+        """
+        import pyaudio
+
+        self._initialize_pa()
+
+        if self.output_stream:
+            self.output_stream.close()
+
+        self.output_stream = self.pa.open(
+            channels=1,
+            format=pyaudio.paInt16,
+            frames_per_buffer=self.output_buffer_size,
+            output=True,
+            rate=sample_rate,
+            stream_callback=self._output_callback,
+        )
+        self.output_sample_rate = sample_rate
+
+    def _output_callback(self, _in_data, frame_count, _time_info, _status):
+        """
+        Fill the output device buffer with queued PCM samples, padding with silence when nothing is queued.
+
+        This method is invoked by PortAudio on its own thread.
+        """
+        import pyaudio
+
+        out = np.zeros(frame_count, dtype=np.int16)
+        filled = 0
+        callbacks: List[Callable[[], None]] = []
+
+        with self._playback_lock:
+            while filled < frame_count and self._playback_buffer:
+                segment = self._playback_buffer[0]
+
+                if not segment.remaining and not segment.is_complete:
+                    # Wait for the samples of a streamed segment that are still being generated
+                    break
+
+                if not segment.offset and segment.remaining:
+                    callbacks.extend(segment.on_started)
+
+                count = min(frame_count - filled, segment.remaining)
+                out[filled : filled + count] = segment.samples[segment.offset : segment.offset + count]
+                filled += count
+                segment.offset += count
+
+                if not segment.remaining:
+                    self._playback_buffer.popleft()
+                    callbacks.extend(segment.on_finished)
+                    self._playback_condition.notify_all()
+
+        # Run callbacks outside the lock so they are free to queue more audio
+        for callback in callbacks:
+            callback()
+
+        return out.tobytes(), pyaudio.paContinue
+
     def close(self) -> None:
         """
-        Close the audio input stream and terminate the PyAudio instance.
+        Close the audio streams and terminate the PyAudio instance.
         """
         if self.input_stream:
             self.input_stream.close()
 
+        if self.output_stream:
+            self.output_stream.close()
+
         if self.pa:
             self.pa.terminate()
 
-    @staticmethod
-    def is_silent(data: np.ndarray) -> bool:
+    def _monitor_speech(self, on_speech: Callable[[], None]) -> None:
+        """
+        Watch the microphone until speech is detected or monitoring is stopped.
+
+        On speech, the frames leading up to it are stored in `barge_in_frames`, `on_speech` is called and the input
+        stream is left running so that `record_audio` can continue the utterance from the capture buffer without
+        losing audio.
+
+        Args:
+            on_speech: The function to call when speech is detected.
+        """
+        vad = create_vad(self.RATE, **self._barge_in_vad_config)
+        pre_roll_size = (self.pre_roll_frames + self.barge_in_speech_frames) * self.frame_size
+        speech_run = 0
+
+        while not self._monitor_stop.is_set():
+            data = self._read_frame(timeout=0.1)
+
+            if data is None:
+                continue
+
+            speech_run = speech_run + 1 if vad.is_speech(data) else 0
+
+            if speech_run >= self.barge_in_speech_frames:
+                start = max(self._capture.start, self._read_position - pre_roll_size)
+                self.barge_in_frames = [
+                    self._capture.view(position, position + self.frame_size)
+                    for position in range(start, self._read_position, self.frame_size)
+                ]
+                on_speech()
+                return
+
+            self._capture.discard(self._read_position - pre_roll_size)
+
+        self.input_stream.stop_stream()
+
+    def start_monitoring(self, on_speech: Callable[[], None]) -> None:
+        """
+        Start listening for the user on a background thread while audio is being played.
+
+        Args:
+            on_speech: The function to call, on the monitoring thread, when the user starts speaking.
+        """
+        self.barge_in_frames = []
+        self._monitor_stop.clear()
+        self._start_capture()
+
+        self._monitor = threading.Thread(target=self._monitor_speech, args=(on_speech,), daemon=True)
+        self._monitor.start()
+
+    def stop_monitoring(self) -> List[np.ndarray]:
+        """
+        Stop listening for the user.
+
+        Returns:
+            The frames captured at the onset of the user's speech, or an empty list if the user did not speak.
+        """
+        if self._monitor:
+            self._monitor_stop.set()
+            self._monitor.join()
+            self._monitor = None
+
+        frames, self.barge_in_frames = self.barge_in_frames, []
+
+        return frames
+
+    def stop_playback(self) -> Optional[float]:
+        """
+        Drop all queued audio immediately.
+
+        Callbacks of the dropped segments are not invoked.
+
+        Returns:
+            The fraction of the interrupted segment that had been played, or None if no segment was being played.
         """
-        Check if the given audio data is silent based on the configured threshold.
+        with self._playback_condition:
+            played = None
+
+            if self._playback_buffer and self._playback_buffer[0].offset:
+                head = self._playback_buffer[0]
+                played = head.offset / head.length
+
+            for segment in self._playback_buffer:
+                segment.is_dropped = True
+
+            self._playback_buffer.clear()
+            self._playback_condition.notify_all()
+
+        return played
+
+    def is_playing(self) -> bool:
+        """
+        Check whether queued PCM audio is still being played.
+
+        Returns:
+            True if there are samples left to play, False otherwise.
+        """
+        with self._playback_lock:
+            return bool(self._playback_buffer)
+
+    def notify_when_drained(self, callback: Callable[[], None]) -> None:
+        """
+        Invoke a callback once everything queued so far has been played.
+
+        The callback runs immediately if nothing is queued, otherwise it runs on the output stream thread.
 
         Args:
-            data: The audio data to be checked for silence.
+            callback: The function to call when playback finishes.
+        """
+        with self._playback_lock:
+            if self._playback_buffer:
+                self._playback_buffer[-1].on_finished.append(callback)
+                return
+
+        callback()
+
+    def play_pcm(
+        self,
+        samples: np.ndarray,
+        sample_rate: int,
+        on_started: Optional[Callable[[], None]] = None,
+        on_finished: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Queue 16-bit PCM samples for playback without going through the filesystem.
+
+        Samples are appended to the playback buffer and played back-to-back by the output stream, so consecutive
+        segments play without gaps.
+
+        Args:
+            samples: Mono int16 PCM samples.
+            sample_rate: The sample rate of the samples.
+            on_started: An optional callback invoked on the output stream thread when playback of the samples starts.
+            on_finished: An optional callback invoked on the output stream thread once the samples have been played.
+        """
+        if not self.output_stream or self.output_sample_rate != sample_rate:
+            self._initialize_output_stream(sample_rate)
+
+        segment = _PlaybackSegment(np.ascontiguousarray(samples, dtype=np.int16))
+
+        if on_started:
+            segment.on_started.append(on_started)
+
+        if on_finished:
+            segment.on_finished.append(on_finished)
+
+        with self._playback_lock:
+            self._playback_buffer.append(segment)
+
+    def play_pcm_frames(
+        self,
+        frames: Iterable[np.ndarray],
+        sample_rate: int,
+        on_started: Optional[Callable[[], None]] = None,
+        on_finished: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Queue 16-bit PCM samples for playback while they are still being generated.
+
+        The samples are queued as one segment right away and each frame is appended to it as soon as the iterator
+        yields it, so playback starts with the first frame rather than once the whole segment has been generated.
+        Blocks until the iterator is exhausted, or until the segment is dropped by `stop_playback`, in which case the
+        iterator is closed early.
+
+        Args:
+            frames: An iterator of mono int16 PCM frames, such as `TTS.stream`.
+            sample_rate: The sample rate of the samples.
+            on_started: An optional callback invoked on the output stream thread when playback of the samples starts.
+            on_finished: An optional callback invoked on the output stream thread once all samples have been played.
+        """
+        if not self.output_stream or self.output_sample_rate != sample_rate:
+            self._initialize_output_stream(sample_rate)
+
+        segment = _PlaybackSegment(np.zeros(sample_rate, dtype=np.int16), is_complete=False, length=0)
+
+        if on_started:
+            segment.on_started.append(on_started)
+
+        if on_finished:
+            segment.on_finished.append(on_finished)
+
+        with self._playback_lock:
+            self._playback_buffer.append(segment)
+
+        iterator = iter(frames)
+
+        try:
+            for frame in iterator:
+                # Only this thread writes to the segment, and the output callback only reads its first `length`
+                # samples, so the frame is copied without holding the lock
+                samples = segment.samples
+                end = segment.length + len(frame)
+
+                if end > len(samples):
+                    samples = np.zeros(max(end, 2 * len(samples)), dtype=np.int16)
+                    samples[: segment.length] = segment.samples[: segment.length]
+
+                samples[segment.length : end] = frame
+
+                with self._playback_lock:
+                    if segment.is_dropped:
+                        break
+
+                    segment.samples = samples
+                    segment.length = end
+        finally:
+            with self._playback_lock:
+                segment.is_complete = True
+
+            close = getattr(iterator, "close", None)
+
+            if close:
+                close()
+
+    def wait_for_playback(self, max_queued: int = 0, timeout: Optional[float] = None) -> bool:
+        """
+        Block until at most `max_queued` PCM segments (including the one being played) are left in the buffer.
+
+        Args:
+            max_queued: The number of segments that may remain queued. Zero waits for playback to finish.
+            timeout: The maximum number of seconds to wait, or None to wait indefinitely.
 
         Returns:
-            True if the audio data is silent, False otherwise.
+            True if the condition was met, False if the wait timed out.
         """
-        return np.max(data) < AudioIO.THRESHOLD
+        with self._playback_condition:
+            return self._playback_condition.wait_for(lambda: len(self._playback_buffer) <= max_queued, timeout)
 
     @staticmethod
     def play_wav(file_path: str) -> None:
@@ -100,55 +886,113 @@ class AudioIO:
         Args:
             file_path: The path to the WAV file to be played.
         """
+        # Suppress pygame's support prompt without the need to set PYGAME_HIDE_SUPPORT_PROMPT environment variable
+        with suppress_stdout_stderr():
+            import pygame.mixer
+
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+
         pygame.mixer.music.load(file_path)
         pygame.mixer.music.play()
 
-    def record_audio(self) -> Optional[Dict[str, Union[int, np.ndarray]]]:
+    def record_audio(
+        self,
+        on_frame: Optional[Callable[[np.ndarray, bool], None]] = None,
+        initial_frames: Optional[List[np.ndarray]] = None,
+    ) -> Optional[Dict[str, Union[int, np.ndarray]]]:
         """
-        Record audio from the microphone and return the recorded data.
+        Record an utterance from the microphone and return the recorded data.
+
+        Frames captured shortly before speech onset are kept in the capture buffer and included in the recording,
+        and the recording stops once the detector has seen `hangover_frames` non-speech frames in a row, or after
+        `max_utterance_frames` frames, so noise mistaken for speech cannot keep it going for ever. Recorded
+        frames are preprocessed as they are read, so only gain normalization is left once the utterance ends.
+
+        Args:
+            on_frame: An optional callback receiving every recorded frame, starting with the pre-roll, along with the
+                VAD decision for it. Used to process the utterance while it is still being spoken. Frames are
+                preprocessed float32 samples at `preprocessor.output_rate`, valid until the next recording starts.
+            initial_frames: Frames of an utterance that has already started, as returned by `stop_monitoring` when
+                the user interrupted playback. Recording then continues from them instead of waiting for speech.
 
         Returns:
-            A dictionary containing the recorded audio data and the sampling rate, or None if no audio was recorded.
+            A dictionary containing the preprocessed audio data and its sampling rate, or None if no audio was
+            recorded.
         """
-        if not self.input_stream:
-            self._initialize_input_stream()
+        self._start_capture()
+
+        frames = list(initial_frames or [])
+        pre_roll_size = (self.pre_roll_frames + self.min_speech_frames) * self.frame_size
+        # The initial frames are the last ones read from the capture buffer by the monitoring thread
+        start = self._read_position - sum(len(frame) for frame in frames)
+        speech_run = 0
+        silence_run = 0
+        recording = bool(frames)
 
-        frames: List[np.ndarray] = []
-        current_silence = 0
-        recording = False
+        self.preprocessor.reset()
+
+        if recording:
+            print_system_message("Sound detected, starting recording...", log_level=logging.INFO)
 
-        self.input_stream.start_stream()
-        print_system_message("Listening for sound...", log_level=logging.INFO)
+            for frame in frames:
+                processed = self.preprocessor.process(frame)
+
+                if on_frame:
+                    on_frame(processed, True)
+        else:
+            print_system_message("Listening for sound...", log_level=logging.INFO)
 
         while True:
-            data: np.ndarray = np.frombuffer(self.input_stream.read(self.CHUNK), dtype=np.int16)
+            data = self._read_frame()
+            assert data is not None
+            is_speech = self.vad.is_speech(data)
+
+            if not recording:
+                speech_run = speech_run + 1 if is_speech else 0
+
+                if speech_run >= self.min_speech_frames:
+                    print_system_message("Sound detected, starting recording...", log_level=logging.INFO)
+                    start = max(self._capture.start, self._read_position - pre_roll_size)
+                    recording = True
 
-            if not recording and not self.is_silent(data):
-                print_system_message("Sound detected, starting recording...", log_level=logging.INFO)
-                recording = True
+                    positions = range(start, self._read_position, self.frame_size)
 
-            if recording:
-                frames.append(data)
-                if self.is_silent(data):
-                    current_silence += 1
+                    for index, position in enumerate(positions):
+                        processed = self.preprocessor.process(self._capture.view(position, position + self.frame_size))
+
+                        if on_frame:
+                            on_frame(processed, index >= len(positions) - speech_run)
                 else:
-                    current_silence = 0
+                    self._capture.discard(self._read_position - pre_roll_size)
 
-                if current_silence > (self.SILENCE_LIMIT * self.RATE / self.CHUNK):
-                    print_system_message("Silence detected, stopping recording...", log_level=logging.INFO)
-                    break
+                continue
 
-        self.input_stream.stop_stream()
+            silence_run = 0 if is_speech else silence_run + 1
+            processed = self.preprocessor.process(data)
 
-        if recording:
-            raw_data = np.hstack(frames)
+            if on_frame:
+                on_frame(processed, is_speech)
 
-            # Convert to float32 and normalize for Hugging Face's `automatic-speech-recognition` pipeline.
-            normalized_data = raw_data.astype(np.float32) / np.iinfo(np.int16).max
+            if silence_run >= self.hangover_frames:
+                print_system_message("Silence detected, stopping recording...", log_level=logging.INFO)
+                break
 
-            return {
-                "raw": normalized_data,
-                "sampling_rate": self.RATE,
-            }
-        else:
-            return None
+            if self._read_position - start >= self.max_utterance_frames * self.frame_size:
+                print_system_message(
+                    "Maximum utterance length reached, stopping recording...",
+                    color=Fore.YELLOW,
+                    log_level=logging.WARNING,
+                )
+                break
+
+        self.input_stream.stop_stream()
+
+        # Keep only as much trailing silence as leading silence
+        trailing = max(0, silence_run - self.pre_roll_frames)
+        normalized_data = self.preprocessor.finish(self._read_position - trailing * self.frame_size - start)
+
+        return {
+            "raw": normalized_data,
+            "sampling_rate": self.preprocessor.output_rate,
+        }
@@ -0,0 +1,127 @@
+"""
+This module provides a micro-batching scheduler that groups concurrent model requests into batches.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+
+I = TypeVar("I")
+O = TypeVar("O")
+
+
+class MicroBatcher(Generic[I, O]):
+    """
+    Collects requests arriving within a short window and runs them through a model as one batch.
+
+    The first request of a batch starts a window of `max_delay_ms`. The batch is dispatched when the window closes or
+    as soon as it holds `max_batch_size` requests, whichever comes first, so batching never adds more than
+    `max_delay_ms` to a request on an idle model. Batches run one at a time on a worker thread; requests arriving while
+    a batch is running form the next batch, which is dispatched as soon as the running one completes. Every request
+    gets its own future, and cancelled requests are dropped from the batch before it runs.
+
+    Must be used from a single event loop.
+
+    Args:
+        process: A function mapping a list of inputs to the list of their outputs, in the same order.
+        max_batch_size: The maximum number of requests in a batch (default: 8).
+        max_delay_ms: The maximum time the first request of a batch waits for others to join, in milliseconds
+            (default: 10).
+        name: The name of the worker thread.
+
+    Attributes:
+        process: The function running a batch.
+        max_batch_size: The maximum number of requests in a batch.
+        max_delay: The maximum time the first request of a batch waits for others to join, in seconds.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[I]], List[O]],
+        max_batch_size: int = 8,
+        max_delay_ms: float = 10.0,
+        name: str = "batch",
+    ) -> None:
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000
+
+        self._pending: List[Tuple[I, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    async def submit(self, item: I) -> O:
+        """
+        Run an input through the model as part of the next batch.
+
+        Args:
+            item: The input.
+
+        Returns:
+            The output for the input.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None and self._running is None:
+            self._timer = loop.call_later(self.max_delay, self._dispatch)
+
+        return await future
+
+    def _dispatch(self) -> None:
+        """
+        Start the next batch, unless one is running, in which case it is started once that one completes.
+        """
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._running:
+            return
+
+        batch = [(item, future) for item, future in self._pending[: self.max_batch_size] if not future.done()]
+        del self._pending[: self.max_batch_size]
+
+        if batch:
+            self._running = asyncio.get_running_loop().create_task(self._run(batch))
+        elif self._pending:
+            self._dispatch()
+
+    async def _run(self, batch: List[Tuple[I, asyncio.Future]]) -> None:
+        """
+        Run a batch on the worker thread and resolve the futures of its requests.
+
+        Args:
+            batch: The inputs with their futures.
+        """
+        loop = asyncio.get_running_loop()
+
+        try:
+            outputs = await loop.run_in_executor(self._executor, self.process, [item for item, _ in batch])
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+        finally:
+            self._running = None
+
+            # Requests that arrived while the batch was running have already waited long enough
+            if self._pending:
+                self._dispatch()
+
+    def close(self) -> None:
+        """
+        Stop the worker thread without waiting for a running batch.
+        """
+        if self._timer:
+            self._timer.cancel()
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
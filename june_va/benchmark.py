@@ -0,0 +1,322 @@
+"""
+Offline benchmark for the STT -> LLM -> TTS pipeline.
+
+Recorded WAV utterances are replayed through the Speech-to-Text model, the Language Model is replaced by a local
+stand-in that streams canned tokens at a fixed rate, and every chunk is synthesized by the Text-to-Speech model. No
+microphone, speaker or ollama daemon is needed, which makes the numbers reproducible across machines and commits.
+Every turn starts from the same prompt: the chat history and the response cache are disabled.
+"""
+
+import json
+import logging
+import re
+import time
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from json import loads
+from typing import Any, Dict, Iterator, List, Optional
+
+import click
+import numpy as np
+from colorama import Fore
+
+from . import __version__
+from .audio import to_pcm16
+from .models import LLM, STT, TTS
+from .segmenter import TextSegmenter
+from .settings import default_config
+from .tracing import Trace
+from .utils import deep_merge_dicts, logger, print_system_message
+
+DEFAULT_RESPONSE = (
+    "Sure! Here is a short answer to your question. The quick brown fox jumps over the lazy dog, which is a "
+    "sentence that contains every letter of the alphabet. It is often used to test typewriters, fonts and, as in "
+    "this case, speech synthesis. Let me know if you would like to hear more."
+)
+
+
+class StubClient:
+    """
+    A stand-in for `ollama.Client` that streams a canned response instead of calling an ollama server.
+
+    Args:
+        response: The text returned for every chat request.
+        tokens_per_second: The rate at which tokens are streamed.
+        first_token_delay: The number of seconds to wait before the first token, emulating prompt processing.
+
+    Attributes:
+        tokens: The response split into word-like tokens.
+        tokens_per_second: The rate at which tokens are streamed.
+        first_token_delay: The number of seconds to wait before the first token.
+    """
+
+    def __init__(self, response: str, tokens_per_second: float, first_token_delay: float) -> None:
+        self.tokens: List[str] = re.findall(r"\s*\S+", response)
+        self.tokens_per_second = tokens_per_second
+        self.first_token_delay = first_token_delay
+
+    def show(self, model: str) -> Dict[str, Any]:
+        """
+        Pretend that every model exists.
+        """
+        return {"model": model}
+
+    def chat(self, *_args, stream: bool = False, **_kwargs) -> Any:
+        """
+        Return the canned response, streamed token by token when `stream` is set.
+        """
+        chunks = self._stream()
+
+        if stream:
+            return chunks
+
+        return {"message": {"role": "assistant", "content": "".join(chunk["message"]["content"] for chunk in chunks)}}
+
+    def _stream(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the tokens of the response in the format of ollama's streaming chat responses.
+        """
+        time.sleep(self.first_token_delay)
+
+        for index, token in enumerate(self.tokens):
+            if index:
+                time.sleep(1 / self.tokens_per_second)
+
+            yield {"done": False, "message": {"role": "assistant", "content": token}}
+
+        yield {"done": True, "message": {"role": "assistant", "content": ""}}
+
+
+def load_wav(file_path: str) -> Dict[str, Any]:
+    """
+    Load a 16-bit PCM WAV file as the input format of `STT.forward`.
+
+    Args:
+        file_path: The path to the WAV file.
+
+    Returns:
+        A dictionary with the mono float32 samples under 'raw' and the sample rate under 'sampling_rate'.
+    """
+    with wave.open(file_path, "rb") as wav_file:
+        if wav_file.getsampwidth() != 2:
+            raise click.BadParameter(f"{file_path} is not a 16-bit PCM WAV file")
+
+        channels = wav_file.getnchannels()
+        sampling_rate = wav_file.getframerate()
+        samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+
+    samples = samples.reshape(-1, channels).mean(axis=1)
+
+    return {"raw": (samples / np.iinfo(np.int16).max).astype(np.float32), "sampling_rate": sampling_rate}
+
+
+def run_turn(
+    trace: Trace,
+    llm_model: LLM,
+    stt_model: Optional[STT],
+    tts_model: Optional[TTS],
+    audio: Optional[Dict[str, Any]],
+    prompt: str,
+) -> Dict[str, float]:
+    """
+    Run one turn of the pipeline without audio devices and record its timings.
+
+    Chunks are synthesized on a worker thread as soon as the segmenter emits them, while the response is still being
+    generated, so time-to-first-audio reflects the pipelined CLI rather than the whole generation.
+
+    Args:
+        trace: The trace to record the timings in.
+        llm_model: The Language Model, backed by a `StubClient`.
+        stt_model: The Speech-to-Text model, or None to use `prompt` as user input.
+        tts_model: The Text-to-Speech model, or None to skip synthesis.
+        audio: The recorded utterance for the Speech-to-Text model.
+        prompt: The user input used when there is no utterance.
+
+    Returns:
+        The amount of audio processed, with 'input_audio_s' and 'output_audio_s' in seconds.
+    """
+    amounts = {"input_audio_s": 0.0, "output_audio_s": 0.0}
+
+    trace.mark("speech_end")
+
+    if stt_model and audio is not None:
+        amounts["input_audio_s"] = len(audio["raw"]) / audio["sampling_rate"]
+
+        with trace.span("stt"):
+            prompt = stt_model.forward(audio)
+
+    trace.mark("input_ready")
+    trace.mark("llm_request")
+
+    segmenter = TextSegmenter()
+    chunks: List[str] = []
+    syntheses: List[Future] = []
+
+    def synthesize(index: int, chunk: str) -> float:
+        assert tts_model is not None
+
+        with trace.span("tts", chunk=index, chars=len(chunk)):
+            pcm = to_pcm16(tts_model.forward(chunk))
+
+        if not index:
+            # Playback would start as soon as the first chunk is synthesized
+            trace.mark("playback_start", chunk=index)
+
+        return len(pcm) / tts_model.sample_rate
+
+    # Like the CLI, chunks are synthesized one after another while the rest of the response is generated
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts") as tts_executor:
+
+        def submit(ready_chunks: List[str]) -> None:
+            for chunk in ready_chunks:
+                trace.mark("chunk_ready", chunk=len(chunks), chars=len(chunk))
+
+                if tts_model:
+                    syntheses.append(tts_executor.submit(synthesize, len(chunks), chunk))
+
+                chunks.append(chunk)
+
+        for index, token in enumerate(llm_model.forward(prompt)):
+            if not index:
+                trace.mark("llm_first_token")
+
+            submit(segmenter.feed(token))
+
+        if chunk := segmenter.flush():
+            submit([chunk])
+
+        trace.mark("llm_done")
+
+        amounts["output_audio_s"] = sum(synthesis.result() for synthesis in syntheses)
+
+    return amounts
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """
+    Compute latency statistics.
+
+    Args:
+        values: The measurements in milliseconds.
+
+    Returns:
+        The number of samples, the mean and the 50th, 90th and 99th percentiles.
+    """
+    array = np.asarray(values, dtype=np.float64)
+
+    return {
+        "count": int(array.size),
+        "mean": round(float(array.mean()), 2),
+        "p50": round(float(np.percentile(array, 50)), 2),
+        "p90": round(float(np.percentile(array, 90)), 2),
+        "p99": round(float(np.percentile(array, 99)), 2),
+    }
+
+
+@click.command()
+@click.argument("wav_files", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "-c",
+    "--config",
+    help="Configuration file.",
+    nargs=1,
+    required=False,
+    type=click.File("r", encoding="utf-8"),
+)
+@click.option("--first-token-delay", default=0.2, help="Seconds before the stub LLM streams its first token.")
+@click.option("-n", "--repeat", default=3, help="Number of times every utterance (or the prompt) is replayed.")
+@click.option(
+    "-o",
+    "--output",
+    help="Write the full report as JSON to this file.",
+    required=False,
+    type=click.File("w", encoding="utf-8"),
+)
+@click.option("--prompt", default="Tell me something.", help="User input used when no WAV files are given.")
+@click.option("--response", default=DEFAULT_RESPONSE, help="Canned response streamed by the stub LLM.")
+@click.option("--tokens-per-second", default=30.0, help="Token rate of the stub LLM.")
+@click.option(
+    "-v",
+    "--verbose",
+    help="Verbose mode.",
+    is_flag=True,
+)
+@click.version_option(__version__)
+def main(**kwargs):
+    """
+    Benchmark the voice pipeline offline with recorded WAV utterances and a stub LLM.
+    """
+    if kwargs["verbose"]:
+        logger.setLevel(logging.DEBUG)
+
+    user_config = loads(kwargs["config"].read()) if kwargs["config"] else {}
+    config = deep_merge_dicts(default_config, user_config)
+
+    stt_config = config.get("stt") or {}
+    tts_config = config.get("tts") or {}
+
+    # A growing history or cached responses would make later turns and repeats cheaper than the first
+    llm_model = LLM(**{**config["llm"], "disable_chat_history": True, "response_cache": None})
+    llm_model.model = StubClient(kwargs["response"], kwargs["tokens_per_second"], kwargs["first_token_delay"])
+
+    stt_model = STT(**stt_config) if stt_config and kwargs["wav_files"] else None
+    tts_model = TTS(**tts_config) if tts_config else None
+
+    utterances = [load_wav(file_path) for file_path in kwargs["wav_files"]] or [None]
+    stages: Dict[str, List[float]] = {}
+    totals = {"input_audio_s": 0.0, "output_audio_s": 0.0, "stt_s": 0.0, "tts_s": 0.0}
+    turn = 0
+    started_at = time.perf_counter()
+
+    for _ in range(kwargs["repeat"]):
+        for audio in utterances:
+            turn += 1
+            trace = Trace(turn)
+            amounts = run_turn(trace, llm_model, stt_model, tts_model, audio, kwargs["prompt"])
+            report = trace.report()
+
+            for event in report["events"]:
+                if "duration" in event:
+                    stages.setdefault(event["stage"], []).append(event["duration"])
+
+                    if event["stage"] in ("stt", "tts"):
+                        totals[f"{event['stage']}_s"] += event["duration"] / 1000
+
+            for key, value in report["summary"].items():
+                if value is not None and key != "total":
+                    stages.setdefault(key, []).append(value)
+
+            stages.setdefault("turn", []).append(report["summary"]["total"])
+            totals["input_audio_s"] += amounts["input_audio_s"]
+            totals["output_audio_s"] += amounts["output_audio_s"]
+
+    elapsed = time.perf_counter() - started_at
+    result = {
+        "latency_ms": {stage: summarize(values) for stage, values in stages.items()},
+        "throughput": {
+            "turns_per_second": round(turn / elapsed, 3),
+            # Seconds of audio processed per second of compute; higher is better
+            "stt_realtime_factor": round(totals["input_audio_s"] / totals["stt_s"], 2) if totals["stt_s"] else None,
+            "tts_realtime_factor": round(totals["output_audio_s"] / totals["tts_s"], 2) if totals["tts_s"] else None,
+        },
+    }
+
+    if kwargs["output"]:
+        json.dump(result, kwargs["output"], indent=2)
+
+    lines = [f"{'stage':<22}{'count':>7}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}"]
+
+    for stage, stats in result["latency_ms"].items():
+        lines.append(
+            f"{stage:<22}{stats['count']:>7}{stats['mean']:>10.1f}{stats['p50']:>10.1f}"
+            f"{stats['p90']:>10.1f}{stats['p99']:>10.1f}"
+        )
+
+    for key, value in result["throughput"].items():
+        lines.append(f"{key}: {'n/a' if value is None else value}")
+
+    print_system_message("\n".join(lines), color=Fore.GREEN, log_level=logging.INFO)
+
+
+if __name__ == "__main__":
+    main()
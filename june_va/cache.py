@@ -0,0 +1,357 @@
+"""
+This module provides caches used to skip repeated model inference.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, List, Optional, TypeVar
+
+import numpy as np
+from colorama import Fore
+
+from .utils import print_system_message
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A thread-safe mapping that evicts the least recently used entries once it holds more than `max_entries`.
+
+    Args:
+        max_entries: The maximum number of entries kept.
+
+    Attributes:
+        max_entries: The maximum number of entries kept.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key: The key of the entry.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+
+            self._entries.move_to_end(key)
+
+            return self._entries[key]
+
+    def put(self, key: K, value: V) -> None:
+        """
+        Store an entry, evicting the least recently used ones if the cache is full.
+
+        Args:
+            key: The key of the entry.
+            value: The value to cache.
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> Optional[V]:
+        """
+        Remove an entry.
+
+        Args:
+            key: The key of the entry.
+
+        Returns:
+            The removed value, or None if there was no entry.
+        """
+        with self._lock:
+            return self._entries.pop(key, None)
+
+
+class SynthesisCache:
+    """
+    A content-addressed cache of synthesized speech.
+
+    Entries are keyed on the model identifier, the generation arguments, the normalized text and an optional variant
+    telling apart audio of the same text that was produced differently (such as streamed audio, which is not
+    peak-normalized), and hold 16-bit PCM samples. Recent entries are kept in memory, and when a directory is given
+    every entry is also stored there as a raw `.pcm` file so it survives restarts. The directory is bounded too: the
+    least recently used files are removed once it holds more than `max_disk_entries`.
+
+    Args:
+        model_id: The identifier of the Text-to-Speech model.
+        generation_args: The arguments the model is called with.
+        max_entries: The maximum number of entries kept in memory (default: 128).
+        directory: An optional directory for the on-disk store.
+        max_disk_entries: The maximum number of entries kept on disk (default: 1024).
+
+    Attributes:
+        namespace: A stable description of the model and generation arguments, part of every key.
+        memory: The in-memory LRU cache.
+        directory: The directory of the on-disk store, if any.
+        max_disk_entries: The maximum number of entries kept on disk.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        generation_args: Dict[str, Any],
+        max_entries: int = 128,
+        directory: Optional[str] = None,
+        max_disk_entries: int = 1024,
+    ) -> None:
+        self.namespace = json.dumps([model_id, generation_args], sort_keys=True, default=str)
+        self.memory: LRUCache[str, np.ndarray] = LRUCache(max_entries)
+        self.directory = os.path.expanduser(directory) if directory else None
+        self.max_disk_entries = max_disk_entries
+
+        self._disk_index: OrderedDict[str, None] = OrderedDict()
+        self._disk_lock = threading.Lock()
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".pcm")]
+
+            for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+                self._disk_index[entry.name.removesuffix(".pcm")] = None
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize text so that trivially different spellings of the same phrase share an entry.
+
+        Args:
+            text: The text to normalize.
+
+        Returns:
+            The text in NFKC form with runs of whitespace collapsed.
+        """
+        return " ".join(unicodedata.normalize("NFKC", text).split())
+
+    def key(self, text: str, variant: str = "") -> str:
+        """
+        Compute the cache key of a text.
+
+        Args:
+            text: The text to be synthesized.
+            variant: The way the audio is produced, or an empty string for `TTS.synthesize`.
+
+        Returns:
+            A hexadecimal SHA-256 digest.
+        """
+        namespace = f"{self.namespace}\0{variant}" if variant else self.namespace
+
+        return hashlib.sha256(f"{namespace}\0{self.normalize(text)}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """
+        The path of the on-disk entry of a key.
+        """
+        return os.path.join(self.directory or "", f"{key}.pcm")
+
+    def get(self, text: str, variant: str = "") -> Optional[np.ndarray]:
+        """
+        Look up the synthesized speech of a text.
+
+        Args:
+            text: The text to be synthesized.
+            variant: The way the audio is produced, or an empty string for `TTS.synthesize`.
+
+        Returns:
+            The cached int16 PCM samples, or None on a miss.
+        """
+        key = self.key(text, variant)
+        pcm = self.memory.get(key)
+
+        if pcm is not None or not self.directory:
+            return pcm
+
+        with self._disk_lock:
+            if key not in self._disk_index:
+                return None
+
+            self._disk_index.move_to_end(key)
+
+        try:
+            pcm = np.fromfile(self._path(key), dtype=np.int16)
+            os.utime(self._path(key))
+        except OSError:
+            return None
+
+        self.memory.put(key, pcm)
+
+        return pcm
+
+    def put(self, text: str, pcm: np.ndarray, variant: str = "") -> None:
+        """
+        Store the synthesized speech of a text.
+
+        Args:
+            text: The text that was synthesized.
+            pcm: The int16 PCM samples.
+            variant: The way the audio was produced, or an empty string for `TTS.synthesize`.
+        """
+        key = self.key(text, variant)
+        pcm = np.ascontiguousarray(pcm, dtype=np.int16)
+
+        self.memory.put(key, pcm)
+
+        if not self.directory:
+            return
+
+        # Write to a temporary file first so readers never see a partial entry
+        temp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+
+        try:
+            pcm.tofile(temp_path)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            # A full or read-only disk must not interrupt speech, the entry is still served from memory
+            print_system_message(
+                f"Could not store synthesized speech on disk: {e}", color=Fore.YELLOW, log_level=logging.WARNING
+            )
+
+            try:
+                os.remove(temp_path)
+            except OSError:
+                ...
+
+            return
+
+        with self._disk_lock:
+            self._disk_index[key] = None
+            self._disk_index.move_to_end(key)
+
+            while len(self._disk_index) > self.max_disk_entries:
+                evicted, _ = self._disk_index.popitem(last=False)
+
+                try:
+                    os.remove(self._path(evicted))
+                except OSError:
+                    ...
+
+
+class CachedResponse:
+    """
+    A complete Language Model response, with the synthesized speech of its chunks once they have been spoken.
+
+    Args:
+        tokens: The generated text, in the pieces it was streamed in, so replaying it splits into the same chunks.
+
+    Attributes:
+        tokens: The generated text, in the pieces it was streamed in.
+        audio: The int16 PCM samples of the spoken chunks, by chunk text.
+        created_at: The time the response was generated, as a Unix timestamp.
+    """
+
+    def __init__(self, tokens: List[str]) -> None:
+        self.tokens = tokens
+        self.audio: Dict[str, np.ndarray] = {}
+        self.created_at = time.time()
+
+
+class ResponseCache:
+    """
+    A cache of complete Language Model responses to repeated inputs.
+
+    Entries are keyed on the normalized user input and a hash of the context it was sent with (the system prompt, and
+    the chat history when it is enabled), so an input is only answered from the cache in the same situation. Entries
+    expire `ttl_s` seconds after they were generated, which bounds how stale answers to questions such as the time of
+    day can get, and the least recently used ones are evicted once the cache holds more than `max_entries`.
+
+    Args:
+        max_entries: The maximum number of responses kept (default: 32).
+        ttl_s: The number of seconds a response is served for (default: 3600).
+
+    Attributes:
+        memory: The in-memory LRU cache.
+        ttl: The number of seconds a response is served for.
+    """
+
+    def __init__(self, max_entries: int = 32, ttl_s: float = 3600.0) -> None:
+        self.memory: LRUCache[str, CachedResponse] = LRUCache(max_entries)
+        self.ttl = ttl_s
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize user input so that differences in case, punctuation and spacing do not count as different input.
+
+        Args:
+            text: The user input.
+
+        Returns:
+            The lowercase words of the input in NFKC form, separated by single spaces.
+        """
+        return " ".join(re.sub(r"[^\w\s]", " ", unicodedata.normalize("NFKC", text).lower()).split())
+
+    def key(self, message: str, context: List[Dict[str, str]]) -> str:
+        """
+        Compute the cache key of an input.
+
+        Args:
+            message: The user input message.
+            context: The messages sent along with the input.
+
+        Returns:
+            A hexadecimal SHA-256 digest.
+        """
+        context_json = json.dumps(context, sort_keys=True)
+
+        return hashlib.sha256(f"{context_json}\0{self.normalize(message)}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        Look up a response that has not expired.
+
+        Args:
+            key: The cache key of the input.
+
+        Returns:
+            The cached response, or None on a miss.
+        """
+        response = self.memory.get(key)
+
+        if response is not None and time.time() - response.created_at > self.ttl:
+            self.memory.pop(key)
+            return None
+
+        return response
+
+    def put(self, key: str, tokens: List[str]) -> CachedResponse:
+        """
+        Store a complete response.
+
+        Args:
+            key: The cache key of the input.
+            tokens: The generated text, in the pieces it was streamed in.
+
+        Returns:
+            The cache entry, to which the synthesized speech of the response can be added.
+        """
+        response = CachedResponse(tokens)
+        self.memory.put(key, response)
+
+        return response
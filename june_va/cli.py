@@ -1,70 +1,102 @@
 """
 CLI Application for Text-to-Speech (TTS) and Speech-to-Text (STT) integration with Language Learning Models (LLM).
 
-This module uses asyncio for asynchronous operations, threading for parallel task execution, and various
-third-party libraries for audio processing and command-line interaction.
+This module runs the whole conversation on a single asyncio event loop. Listening, generation and speech are stages
+implemented as coroutines, blocking model inference and device I/O are moved off the loop to threads, and a turn is
+interrupted by cancelling its stage tasks.
 """
 
 import asyncio
 import logging
-import os.path
 import re
-import time
-from json import loads
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from threading import Thread
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import click
-import pygame.mixer
+import numpy as np
 from colorama import Fore, Style, init
 
 from . import __version__
 from .audio import AudioIO
-from .models import LLM, STT, TTS
-from .settings import default_config
-from .utils import ThreadSafeState, deep_merge_dicts, logger, print_system_message
+from .models import LLM, STT, TTSPool
+from .models.llm import SpeculativeResponse
+from .models.loader import SpeechModel, check_llm, load_config, load_speech_models
+from .segmenter import TextSegmenter
+from .tracing import Trace, Tracer
+from .utils import print_system_message, run_in_thread, run_main, threadsafe_callback
 
 logging.getLogger("TTS").setLevel(logging.ERROR)
-pygame.mixer.init()
 
+# Marker put on the chunk queue after the last chunk of an assistant response
+END_OF_TURN = None
 
-class AppState:
-    """Enumeration for application states."""
+# Items of the chunk queue: the index of the chunk and its text (or `END_OF_TURN`)
+ChunkItem = Tuple[int, Optional[str]]
 
-    READY_FOR_INPUT = 0  # Ready to take user input
-    LLM_RESPONSE_GENERATED = 1
+# The chunks of the current response whose playback has started, in order
+spoken_chunks: List[str] = []
 
+tracer = Tracer()
 
-current_app_state = ThreadSafeState(AppState.READY_FOR_INPUT)
-tts_generation_error = ThreadSafeState(False)
-shutdown_event = asyncio.Event()
+
+def _on_chunk_started(trace: Trace, index: int, text: str) -> None:
+    """
+    Record that a chunk of the response started playing.
+
+    Args:
+        trace: The trace of the turn.
+        index: The index of the chunk in the response.
+        text: The text of the chunk.
+    """
+    trace.mark("playback_start", chunk=index)
+    spoken_chunks.append(text)
 
 
-async def _clear_queue(queue: asyncio.Queue[str]):
+def _normalize_transcript(text: str) -> str:
     """
-    Clear all items from the asyncio queue.
+    Normalize a transcript so that differences in case, punctuation and spacing do not count as different input.
 
     Args:
-        queue: The queue to be cleared.
+        text: The transcript.
+
+    Returns:
+        The lowercase words of the transcript, separated by single spaces.
     """
-    while not queue.empty():
-        _ = await queue.get()
-        queue.task_done()
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def _spoken_text(played: Optional[float]) -> str:
+    """
+    Reconstruct the part of an interrupted response that the user heard.
+
+    Args:
+        played: The fraction of the interrupted chunk that had been played, or None if no chunk was playing.
+
+    Returns:
+        The spoken text, with the interrupted chunk cut proportionally at a word boundary.
+    """
+    chunks = list(spoken_chunks)
+
+    if chunks and played is not None:
+        words = chunks[-1].split()
+        chunks[-1] = " ".join(words[: round(len(words) * played)])
+
+    return " ".join(chunk for chunk in chunks if chunk)
 
 
 async def _real_main(**kwargs):
     """
-    Main function to set up models, process configurations, and handle producer-consumer tasks.
+    Main function to set up models, process configurations, and run the conversation.
 
     Args:
         **kwargs: Arbitrary keyword arguments including config file.
     """
-    user_config = loads(kwargs["config"].read()) if kwargs["config"] else {}
-    config = deep_merge_dicts(default_config, user_config)
+    tracer.output = kwargs["trace"]
+    startup = Trace(0)
 
-    llm_config = config["llm"]
-    stt_config = config.get("stt") or {}
-    tts_config = config.get("tts") or {}
+    llm_config, stt_config, tts_config = load_config(kwargs["config"])
 
     if stt_config:
         try:
@@ -82,8 +114,8 @@ async def _real_main(**kwargs):
 
     llm_model = LLM(**llm_config)
 
-    if not llm_model.exists():
-        print_system_message(f"Invalid ollama model: {llm_model.model_id}", color=Fore.RED, log_level=logging.ERROR)
+    if not await check_llm(startup, llm_model):
+        llm_model.close()
         return 2
 
     if llm_config.get("disable_chat_history"):
@@ -96,231 +128,507 @@ async def _real_main(**kwargs):
     if not llm_config.get("system_prompt"):
         print_system_message("No system prompt provided.")
 
-    stt_model = STT(**stt_config) if stt_config else None
-    tts_model = TTS(**tts_config) if tts_config else None
+    # Load the LLM on the ollama server while the local models are loading
+    Thread(target=llm_model.warm_up, daemon=True).start()
 
-    text_queue = asyncio.Queue()
+    stt_model, tts_model = await load_speech_models(startup, stt_config, tts_config)
 
-    # Run consumer task in separate thread
-    thread = Thread(target=run_async_tasks, args=(text_queue, tts_model))
-    thread.start()
+    audio_io = AudioIO(
+        vad=stt_config.get("vad"),
+        barge_in=stt_config.get("barge_in"),
+        preprocessing=stt_config.get("preprocessing"),
+        output_buffer_size=tts_config.get("output_buffer_size"),
+    )
+    segmenter = TextSegmenter(**(tts_config.get("segmenter") or {}))
+
+    # A single worker keeps synthesis calls sequential, including those of interrupted turns still finishing
+    tts_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+
+    startup.mark("ready")
+    tracer.finish_startup(startup)
 
     try:
-        producer(text_queue, llm_model, stt_model)
-    except KeyboardInterrupt:
-        ...
+        await converse(
+            llm_model, stt_model, tts_model, audio_io, segmenter, tts_executor, tts_config.get("lookahead", 2)
+        )
     finally:
-        shutdown_event.set()
-        thread.join()
-        await _clear_queue(text_queue)
-        await text_queue.join()
+        audio_io.stop_monitoring()
+        tts_executor.shutdown(wait=False, cancel_futures=True)
+
+        if isinstance(tts_model, TTSPool):
+            tts_model.close()
 
-        if tts_model and os.path.exists(tts_model.file_path):
-            os.remove(tts_model.file_path)
+        llm_model.close()
+        audio_io.close()
 
 
-async def consumer(text_queue: asyncio.Queue[str], tts_model: Optional[TTS]):
-    chunk_counter = 0  # 생성할 파일에 고유한 번호를 붙이기 위한 카운터
-    created_files = [] # 생성된 파일 경로를 저장할 리스트 초기화
+async def listen(
+    trace: Trace,
+    stt_model: Optional[STT],
+    llm_model: LLM,
+    audio_io: AudioIO,
+    initial_frames: List[np.ndarray],
+) -> Tuple[str, Optional[SpeculativeResponse]]:
     """
-    Consumer task to process text from the queue and generate TTS output.
+    Input stage: record and transcribe an utterance, or read typed input when there is no Speech-to-Text model.
+
+    When the streaming transcriber speculates (see `StreamingTranscriber`), the LLM request is started on the
+    speculative transcript while the end of speech is being confirmed. The request is kept if the final transcript
+    is the same up to case and punctuation, and discarded otherwise.
 
     Args:
-        text_queue: Queue containing text to process.
-        tts_model: Text-to-Speech model for generating audio.
+        trace: The trace of the turn.
+        stt_model: Speech-to-Text model for transcribing audio input.
+        llm_model: Language Learning Model speculative requests are sent to.
+        audio_io: The audio device wrapper used for recording.
+        initial_frames: Frames of an utterance that interrupted the previous response.
+
+    Returns:
+        The user input, and the response already requested for it, if any.
     """
-    with AudioIO() as audio_io:
-        while not shutdown_event.is_set():
-            try:
-                synthesis = None
-                text_buffer = text_queue.get_nowait()
-                if tts_model:
-                    try:
-                        synthesis = tts_model.forward(text_buffer)
-                    except:
-                        tts_generation_error.set_value(True)
-
-                if synthesis:
-                    output_file_path = f"{tts_model.file_path.rsplit('.', 1)[0]}_{chunk_counter}.wav"
-                    chunk_counter += 1
-                    while pygame.mixer.music.get_busy():
-                        await asyncio.sleep(0.25)
-
-                    created_files.append(output_file_path)
-
-                    #tts_model.model.synthesizer.save_wav(wav=synthesis, path=tts_model.file_path)
-                    tts_model.model.synthesizer.save_wav(wav=synthesis, path=output_file_path)
-                    audio_io.play_wav(output_file_path)
-                    #audio_io.play_wav(tts_model.file_path)
-
-                text_queue.task_done()
-                
-            except asyncio.QueueEmpty:
-                if current_app_state.get_value() != AppState.READY_FOR_INPUT:
-                    # Wait for the last chunk of speech to be played fully
-                    while pygame.mixer.music.get_busy():
-                        await asyncio.sleep(0.5)
-
-                    for f in created_files:
-                        try:
-                            os.remove(f)
-                        except OSError as e:
-                            logger.warning(f"Error removing file {f}: {e}")
-                    
-                    created_files.clear() # 다음 응답을 위해 리스트를 비웁니다.
-                    chunk_counter = 0 # 카운터도 초기화해주는 것이 좋습니다.
-
-                    current_app_state.set_value(AppState.READY_FOR_INPUT)
-
-                await asyncio.sleep(0.25)
-
-
-async def start_async_tasks(text_queue: asyncio.Queue[str], tts_model: Optional[TTS]):
+    if stt_model:
+        transcriber = stt_model.stream(audio_io.preprocessor.output_rate) if stt_model.is_streaming_enabled else None
+        speculation: Optional[SpeculativeResponse] = None
+        is_closed = False
+
+        def speculate(text: str) -> None:
+            nonlocal speculation
+
+            # Results posted by the transcription thread may arrive after the input has been finalized
+            if is_closed or not text:
+                return
+
+            if speculation and _normalize_transcript(speculation.message) == _normalize_transcript(text):
+                return
+
+            trace.mark("speculation_start", chars=len(text))
+            speculation = SpeculativeResponse(llm_model, text, speculation)
+
+        if transcriber:
+            loop = asyncio.get_running_loop()
+            transcriber.on_speculation = threadsafe_callback(loop, speculate)
+
+        try:
+            with trace.span("record"):
+                audio_data = await run_in_thread(
+                    audio_io.record_audio,
+                    transcriber.feed if transcriber else None,
+                    initial_frames,
+                )
+
+            trace.mark("speech_end")
+
+            if audio_data is not None:
+                print_system_message("Transcribing audio...")
+
+                with trace.span("stt"):
+                    if transcriber:
+                        transcription, is_speculative = await asyncio.to_thread(transcriber.finalize)
+
+                        # The speculative result may not have reached `speculate` yet, which would lose its request
+                        if is_speculative:
+                            speculate(transcription)
+                    else:
+                        transcription = await asyncio.to_thread(stt_model.forward, audio_data)
+
+                trace.mark("input_ready")
+
+                if speculation and _normalize_transcript(speculation.message) == _normalize_transcript(transcription):
+                    trace.mark("speculation_accepted")
+                    speculation, accepted = None, speculation
+
+                    return transcription, accepted
+
+                return transcription, None
+        finally:
+            is_closed = True
+
+            if transcriber:
+                transcriber.on_speculation = None
+
+            if speculation:
+                trace.mark("speculation_discarded")
+                await speculation.discard()
+
+    user_input = await run_in_thread(input, f"{Style.BRIGHT}{Fore.CYAN}[user]>{Style.RESET_ALL} ")
+    trace.mark("input_ready")
+
+    return user_input, None
+
+
+async def generate(
+    trace: Trace,
+    user_input: str,
+    llm_model: LLM,
+    segmenter: TextSegmenter,
+    chunks: "asyncio.Queue[ChunkItem]",
+    speculation: Optional[SpeculativeResponse] = None,
+    audio: Optional[Dict[str, np.ndarray]] = None,
+) -> None:
     """
-    Start consumer task for processing text queue.
+    LLM stage: stream the response, print it and queue its chunks for the speech stage.
 
     Args:
-        text_queue: Queue containing text to process.
-        tts_model: Text-to-Speech model for generating audio.
+        trace: The trace of the turn.
+        user_input: The user input.
+        llm_model: Language Learning Model for processing user input.
+        segmenter: The segmenter that splits responses into TTS chunks.
+        chunks: The queue the chunks are put on, followed by `END_OF_TURN`.
+        speculation: The response already requested for the user input, if any.
+        audio: Synthesized speech by chunk text, which the speech of a cached response is added to.
     """
-    consumer_task = asyncio.create_task(consumer(text_queue, tts_model))
+    trace.mark("llm_request")
+    chunk_count = 0
+    response = speculation.tokens() if speculation else llm_model.aforward(user_input)
 
     try:
-        # Wait until consumer finishes
-        await consumer_task
-    except asyncio.CancelledError:
-        ...
+        token_index = 0
 
+        async for token in response:
+            if not token_index:
+                trace.mark("llm_first_token")
 
-@click.command()
-@click.option(
-    "-c",
-    "--config",
-    help="Configuration file.",
-    nargs=1,
-    required=False,
-    type=click.File("r", encoding="utf-8"),
-)
-@click.option(
-    "-v",
-    "--verbose",
-    help="Verbose mode.",
-    is_flag=True,
-)
-@click.version_option(__version__)
-def main(**kwargs):
-    """
-    Local voice assistant tool.
-    """
-    if kwargs["verbose"]:
-        logger.setLevel(logging.DEBUG)
+                # A replayed response comes with the speech of its chunks
+                if audio is not None and llm_model.last_response:
+                    audio.update(llm_model.last_response.audio)
+
+            token_index += 1
+            print(token, end="", flush=True)
 
-    asyncio.run(_real_main(**kwargs))
+            for chunk in segmenter.feed(token):
+                trace.mark("chunk_ready", chunk=chunk_count, chars=len(chunk))
+                chunks.put_nowait((chunk_count, chunk))
+                chunk_count += 1
 
+        # Process any remaining text in the segmenter
+        if last_chunk := segmenter.flush():
+            trace.mark("chunk_ready", chunk=chunk_count, chars=len(last_chunk))
+            chunks.put_nowait((chunk_count, last_chunk))
 
-def producer(text_queue: asyncio.Queue[str], llm_model: LLM, stt_model: Optional[STT]) -> None:
+        trace.mark("llm_done")
+    except TimeoutError as e:
+        print_system_message(str(e), color=Fore.YELLOW, log_level=logging.WARNING)
+    finally:
+        # Abort the request if the turn was interrupted, and store the response in the history
+        await response.aclose()
+
+        if speculation:
+            await speculation.aclose()
+        segmenter.reset()
+
+        # Lets the speech stage finish what was queued, even if generation failed
+        chunks.put_nowait((chunk_count, END_OF_TURN))
+
+
+async def speak(
+    trace: Trace,
+    tts_model: Optional[SpeechModel],
+    audio_io: AudioIO,
+    chunks: "asyncio.Queue[ChunkItem]",
+    tts_executor: ThreadPoolExecutor,
+    lookahead: int = 2,
+    audio: Optional[Dict[str, np.ndarray]] = None,
+) -> int:
     """
-    Producer task to gather user input, process with LLM, and queue for TTS.
+    Speech stage: synthesize queued chunks and play them until the end of the response has been played.
+
+    Chunks are synthesized as they arrive and played back in order, so with a `TTSPool` several chunks are
+    synthesized in parallel. At most `lookahead` chunks wait for synthesis to finish, and finished chunks are queued on
+    the output stream back-to-back while fewer than `lookahead` are waiting to be played, so the next sentence is
+    usually ready by the time the current one ends. When streaming is enabled on an in-process model, every chunk is
+    queued for playback as soon as its synthesis starts and its frames are played while it is being generated.
 
     Args:
-        text_queue: Queue to put processed text chunks.
-        llm_model: Language Learning Model for processing user input.
-        stt_model: Speech-to-Text model for transcribing audio input.
+        trace: The trace of the turn.
+        tts_model: Text-to-Speech model for generating audio.
+        audio_io: The audio device wrapper used for playback.
+        chunks: The queue of chunks to speak, terminated by `END_OF_TURN`.
+        tts_executor: The executor in-process synthesis runs on.
+        lookahead: The maximum number of chunks being synthesized, and of synthesized chunks waiting to be played.
+        audio: Synthesized speech by chunk text, used instead of synthesizing those chunks and completed with the
+            speech of the others.
+
+    Returns:
+        The number of chunks that could not be synthesized.
     """
-    audio_io = AudioIO()
-    min_chunk_size = 10
-    splitters = [".", ",", "?", ":", ";"]
+    loop = asyncio.get_running_loop()
+    failures = 0
 
-    def get_user_input():
-        if stt_model:
-            audio_data = audio_io.record_audio()
+    # Synthesis tasks in the order of their chunks, terminated by `END_OF_TURN`
+    syntheses: "asyncio.Queue[Optional[Tuple[int, str, asyncio.Task]]]" = asyncio.Queue(maxsize=max(1, lookahead))
 
-            if audio_data is not None:
-                print_system_message("Transcribing audio...")
+    async def synthesize(index: int, text: str) -> np.ndarray:
+        assert tts_model is not None
 
-                transcription = stt_model.forward(audio_data)
+        if audio is not None and text in audio:
+            return audio[text]
 
-                return transcription
+        with trace.span("tts", chunk=index, chars=len(text)):
+            if isinstance(tts_model, TTSPool):
+                pcm = await asyncio.wrap_future(tts_model.submit(text))
+            elif tts_model.is_streaming_enabled:
+                frames: List[np.ndarray] = []
 
-        return input(f"{Style.BRIGHT}{Fore.CYAN}[user]>{Style.RESET_ALL} ")
+                def stream() -> Iterator[np.ndarray]:
+                    for frame in tts_model.stream(text):
+                        frames.append(frame)
 
-    # Regular expression pattern to match 'quit', 'stop', or 'exit', ignoring case
-    exit_pattern = re.compile(r"\b(exit|quit|stop)\b", re.IGNORECASE)
+                        yield frame
 
-    while True:
-        if current_app_state.get_value() != AppState.READY_FOR_INPUT:
-            time.sleep(0.25)
-            continue
+                # The single executor thread starts chunks in order, so their segments are queued in order
+                await loop.run_in_executor(
+                    tts_executor,
+                    partial(
+                        audio_io.play_pcm_frames,
+                        stream(),
+                        tts_model.sample_rate,
+                        on_started=partial(_on_chunk_started, trace, index, text),
+                        on_finished=partial(trace.mark, "playback_end", chunk=index),
+                    ),
+                )
 
-        if tts_generation_error.get_value():
-            print_system_message(
-                "Some text-to-speech generation failed.",
-                color=Fore.YELLOW,
-                log_level=logging.WARNING,
-            )
-            tts_generation_error.set_value(False)
+                if audio is not None and frames:
+                    audio[text] = np.concatenate(frames)
 
-        buffer = []
-        temp_buffer = []
-        user_input = get_user_input()
+                return np.zeros(0, dtype=np.int16)
+            else:
+                pcm = await loop.run_in_executor(tts_executor, tts_model.synthesize, text)
 
-        if stt_model:
-            print(f"{Style.BRIGHT}{Fore.CYAN}[user]>{Style.RESET_ALL} {user_input}")
+        if audio is not None:
+            audio[text] = pcm
+
+        return pcm
+
+    async def dispatch() -> None:
+        while True:
+            index, text = await chunks.get()
 
-        if user_input:
-            if exit_pattern.search(user_input):
-                print_system_message("Exiting...")
+            if text is END_OF_TURN:
                 break
 
-            print(f"{Style.BRIGHT}{Fore.GREEN}[assistant]> {Style.NORMAL}", end="", flush=True)
+            if tts_model:
+                await syntheses.put((index, text, asyncio.create_task(synthesize(index, text))))
 
-            for token in llm_model.forward(user_input):
-                print(token, end="", flush=True)
+        await syntheses.put(END_OF_TURN)
 
-                buffer.append(token)
-                temp_buffer.append(token)
+    dispatcher = asyncio.create_task(dispatch())
 
-                # Check if buffer is ready to be chunked
-                if token == "\n" or (len(buffer) >= min_chunk_size and token in splitters):
-                    print(f"clear before buffer : {buffer}")
-                    chunk = "".join(buffer).strip()
+    try:
+        while (item := await syntheses.get()) is not END_OF_TURN:
+            index, text, synthesis = item
 
-                    buffer.clear()
+            # Syntheses are only queued when there is a model
+            assert tts_model is not None
 
-                    if chunk:
-                        # Queue this chunk for TTS processing
-                        text_queue.put_nowait(chunk)
+            try:
+                pcm = await synthesis
+            except Exception:
+                failures += 1
+                continue
+
+            if pcm.size:
+                audio_io.play_pcm(
+                    pcm,
+                    tts_model.sample_rate,
+                    on_started=partial(_on_chunk_started, trace, index, text),
+                    on_finished=partial(trace.mark, "playback_end", chunk=index),
+                )
+
+            # Do not take further chunks than the look-ahead depth allows
+            await run_in_thread(audio_io.wait_for_playback, lookahead)
+    finally:
+        dispatcher.cancel()
+
+        while not syntheses.empty():
+            if item := syntheses.get_nowait():
+                item[2].cancel()
+
+    drained = asyncio.Event()
+    audio_io.notify_when_drained(threadsafe_callback(loop, drained.set))
+    await drained.wait()
+
+    return failures
+
+
+async def respond(
+    trace: Trace,
+    user_input: str,
+    llm_model: LLM,
+    tts_model: Optional[SpeechModel],
+    audio_io: AudioIO,
+    segmenter: TextSegmenter,
+    tts_executor: ThreadPoolExecutor,
+    lookahead: int,
+    is_barge_in_enabled: bool,
+    speculation: Optional[SpeculativeResponse] = None,
+) -> List[np.ndarray]:
+    """
+    Run the LLM and speech stages of a turn concurrently until the response has been played or interrupted.
 
-            #print(f"\n buffer : \n{temp_buffer}")
-            temp_buffer.clear()
+    When barge-in is enabled, the microphone stays open while the response is generated and played. As soon as the
+    user speaks, both stages are cancelled, which stops playback and aborts the LLM request, the stored response is
+    trimmed to what was actually spoken and the interrupting speech becomes the next user input.
 
-            # Process any remaining text in buffer
-            if buffer:
-                #print(f"rest buffer: {buffer}")
-                chunk = "".join(buffer).strip()
+    Args:
+        trace: The trace of the turn.
+        user_input: The user input.
+        llm_model: Language Learning Model for processing user input.
+        tts_model: Text-to-Speech model for generating audio.
+        audio_io: The audio device wrapper used for playback and monitoring.
+        segmenter: The segmenter that splits responses into TTS chunks.
+        tts_executor: The executor synthesis runs on.
+        lookahead: The maximum number of synthesized chunks waiting to be played.
+        is_barge_in_enabled: Whether the user may interrupt the response by speaking.
+        speculation: The response already requested for the user input, if any.
+
+    Returns:
+        The frames captured at the onset of the user's speech, or an empty list if the user did not interrupt.
+    """
+    loop = asyncio.get_running_loop()
+    chunks: "asyncio.Queue[ChunkItem]" = asyncio.Queue()
+    audio: Dict[str, np.ndarray] = {}
+    spoken_text: Optional[str] = None
+
+    spoken_chunks.clear()
+
+    stages = [
+        asyncio.create_task(generate(trace, user_input, llm_model, segmenter, chunks, speculation, audio), name="llm"),
+        asyncio.create_task(speak(trace, tts_model, audio_io, chunks, tts_executor, lookahead, audio), name="tts"),
+    ]
+
+    def interrupt() -> None:
+        nonlocal spoken_text
+
+        if spoken_text is not None or all(stage.done() for stage in stages):
+            return
+
+        spoken_text = _spoken_text(audio_io.stop_playback())
+        trace.mark("barge_in")
+
+        for stage in stages:
+            stage.cancel()
+
+    if is_barge_in_enabled:
+        # The callback runs on the monitoring thread as soon as the user starts speaking
+        audio_io.start_monitoring(threadsafe_callback(loop, interrupt))
 
-                if chunk:
-                    text_queue.put_nowait(chunk)
+    try:
+        await asyncio.wait(stages)
+    finally:
+        for stage in stages:
+            stage.cancel()
 
-            current_app_state.set_value(AppState.LLM_RESPONSE_GENERATED)
+        initial_frames = audio_io.stop_monitoring()
 
-            print(Style.RESET_ALL)
+    print(Style.RESET_ALL)
 
-    audio_io.close()
+    for stage in stages:
+        if not stage.cancelled() and (exception := stage.exception()):
+            raise exception
 
+    if spoken_text is not None:
+        llm_model.truncate_last_response(spoken_text)
+        print_system_message("Interrupted by the user.")
+    elif stages[1].result():
+        print_system_message(
+            "Some text-to-speech generation failed.",
+            color=Fore.YELLOW,
+            log_level=logging.WARNING,
+        )
+    elif llm_model.last_response:
+        # Keep the speech of a complete response with it, so a repeated input is answered without synthesis
+        llm_model.last_response.audio.update(audio)
 
-def run_async_tasks(text_queue: asyncio.Queue[str], tts_model: Optional[TTS]):
+    tracer.finish_turn(trace)
+
+    return initial_frames
+
+
+async def converse(
+    llm_model: LLM,
+    stt_model: Optional[STT],
+    tts_model: Optional[SpeechModel],
+    audio_io: AudioIO,
+    segmenter: TextSegmenter,
+    tts_executor: ThreadPoolExecutor,
+    lookahead: int = 2,
+) -> None:
     """
-    Run async tasks in a new event loop for thread safety.
+    Run turns until the user asks to exit.
 
     Args:
-        text_queue: Queue to put processed text chunks.
+        llm_model: Language Learning Model for processing user input.
+        stt_model: Speech-to-Text model for transcribing audio input.
         tts_model: Text-to-Speech model for generating audio.
+        audio_io: The audio device wrapper used for recording and playback.
+        segmenter: The segmenter that splits responses into TTS chunks.
+        tts_executor: The executor synthesis runs on.
+        lookahead: The maximum number of synthesized chunks waiting to be played.
     """
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    # Regular expression pattern to match 'quit', 'stop', or 'exit', ignoring case
+    exit_pattern = re.compile(r"\b(exit|quit|stop)\b", re.IGNORECASE)
+    initial_frames: List[np.ndarray] = []
 
-    try:
-        loop.run_until_complete(start_async_tasks(text_queue, tts_model))
-    except Exception:
-        loop.close()
+    while True:
+        trace = tracer.start_turn()
+        user_input, speculation = await listen(trace, stt_model, llm_model, audio_io, initial_frames)
+        initial_frames = []
+
+        if stt_model:
+            print(f"{Style.BRIGHT}{Fore.CYAN}[user]>{Style.RESET_ALL} {user_input}")
+
+        if not user_input or exit_pattern.search(user_input):
+            if speculation:
+                await speculation.discard()
+
+            if not user_input:
+                continue
+
+            print_system_message("Exiting...")
+            break
+
+        print(f"{Style.BRIGHT}{Fore.GREEN}[assistant]> {Style.NORMAL}", end="", flush=True)
+
+        initial_frames = await respond(
+            trace,
+            user_input,
+            llm_model,
+            tts_model,
+            audio_io,
+            segmenter,
+            tts_executor,
+            lookahead,
+            audio_io.is_barge_in_enabled and stt_model is not None,
+            speculation,
+        )
+
+
+@click.command()
+@click.option(
+    "-c",
+    "--config",
+    help="Configuration file.",
+    nargs=1,
+    required=False,
+    type=click.File("r", encoding="utf-8"),
+)
+@click.option(
+    "-t",
+    "--trace",
+    help="Append per-turn latency reports as JSON lines to this file.",
+    nargs=1,
+    required=False,
+    type=click.File("a", encoding="utf-8"),
+)
+@click.option(
+    "-v",
+    "--verbose",
+    help="Verbose mode.",
+    is_flag=True,
+)
+@click.version_option(__version__)
+def main(**kwargs):
+    """
+    Local voice assistant tool.
+    """
+    run_main(_real_main, **kwargs)
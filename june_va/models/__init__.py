@@ -1,3 +1,3 @@
 from .llm import LLM
 from .stt import STT
-from .tts import TTS
+from .tts import TTS, TTSPool
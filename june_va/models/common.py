@@ -3,10 +3,11 @@ This module defines a base class for models used in various tasks such as Text-t
 Models.
 """
 
+import time
 from abc import ABC, ABCMeta, abstractmethod
 from typing import Any, Dict
 
-from ..settings import settings
+from ..settings import default_torch_device
 from ..utils import print_system_message
 
 
@@ -16,16 +17,19 @@ class BaseMeta(ABCMeta):
 
     This metaclass overrides the __call__ method to print a system message
     when a new instance of a model is created. It logs the model's class name,
-    model ID, and the device it's initialized on.
+    model ID, the device it's initialized on and how long loading took.
     """
 
     def __call__(cls, *args, **kwargs):
+        start = time.perf_counter()
+
         # Create the instance using the standard creation process
         instance = super().__call__(*args, **kwargs)
 
         # Print a system message with information about the initialized model
         print_system_message(
-            f"{instance.__class__.__name__} model initialized (model_id={instance.model_id}; device={instance.device})",
+            f"{instance.__class__.__name__} model initialized (model_id={instance.model_id}; "
+            f"device={instance.device}; load_time={time.perf_counter() - start:.2f}s)",
         )
 
         # Return the created instance
@@ -50,7 +54,7 @@ class BaseModel(ABC, metaclass=BaseMeta):
     """
 
     def __init__(self, **kwargs) -> None:
-        self.device: str = kwargs.get("device") or settings.TORCH_DEVICE
+        self.device: str = kwargs.get("device") or default_torch_device()
         self.generation_args: Dict[str, Any] = kwargs.get("generation_args") or {}
         self.model_id: str = kwargs["model"]
 
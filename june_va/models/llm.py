@@ -2,12 +2,24 @@
 This module provides a class for interacting with a Language Model (LLM) using the ollama library.
 """
 
-from typing import Dict, Iterator, List, Optional
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional, Tuple, Union, cast
 
-from ollama import Client, ResponseError
+from ollama import AsyncClient, Client, ResponseError
 
+from ..cache import CachedResponse, ResponseCache
+from ..utils import print_system_message
 from .common import BaseModel
 
+SUMMARY_PROMPT = (
+    "Summarize the following conversation between a user and an assistant in a few sentences. Keep names, facts, "
+    "decisions and open questions. Reply with the summary only."
+)
+
 
 class LLM(BaseModel):
     """
@@ -16,19 +28,46 @@ class LLM(BaseModel):
     This class inherits from the BaseModel class and provides methods for checking if a model exists,
     and generating text from user input using the specified LLM.
 
+    The history is kept within an approximate token budget. Once it grows beyond 'context_budget', the oldest turns
+    are compacted: either dropped, or replaced by a summary that the same model writes in the background. The system
+    prompt is always kept.
+
+    Every request is sent with the same 'options' and 'keep_alive', so ollama keeps the model loaded between turns and
+    never reloads it because of a changed context size. Messages are stored exactly as they were sent or generated,
+    which keeps the prompt prefix byte-identical across turns and lets ollama reuse its cached prompt evaluation.
+
+    With a response cache, complete responses are stored, and an input repeated in the same context is answered by
+    replaying the stored response without a request.
+
     Args:
         **kwargs: Keyword arguments for initializing the LLM, including optional arguments
-            like 'system_prompt' and 'disable_chat_history'.
+            like 'system_prompt', 'disable_chat_history', 'context_budget', 'history_compaction'
+            ('drop' or 'summarize'), 'keep_alive', 'options' (ollama model options such as 'num_ctx'),
+            'response_cache' (see `ResponseCache`) and 'timeout'.
 
     Attributes:
         messages: A list of dictionaries representing the conversation history,
             with each dictionary containing a 'role' (e.g., 'system', 'user', 'assistant') and 'content' keys.
         system_prompt: An optional system prompt to provide context for the conversation.
         is_chat_history_disabled: A flag indicating whether the chat history should be disabled.
+        context_budget: The approximate maximum number of tokens in the history, or None for no limit.
+        history_compaction: How old turns are compacted, either 'drop' or 'summarize'.
+        summary: The message holding the summary of compacted turns, if any.
+        keep_alive: How long ollama keeps the model loaded after a request, e.g. '30m', or -1 for ever.
+        options: The ollama model options sent with every request.
+        timeout: The maximum number of seconds `aforward` waits for the next token, or None to wait indefinitely.
+        response_cache: An optional cache of complete responses, configured through the 'response_cache' keyword
+            argument.
+        last_response: The cache entry replayed by the last request, or stored once it completed, if any. Callers
+            add the synthesized speech of the response to it.
         model: An instance of the ollama.Client for interacting with the LLM.
+        async_model: An instance of the ollama.AsyncClient used by `aforward`.
     """
 
     def __init__(self, **kwargs) -> None:
+        # The model runs on the ollama server, so there is no local device to detect
+        kwargs.setdefault("device", "ollama")
+
         super().__init__(**kwargs)
 
         self.messages: List[Dict[str, str]] = []
@@ -40,7 +79,137 @@ class LLM(BaseModel):
 
         self.is_chat_history_disabled: Optional[bool] = kwargs.get("disable_chat_history")
 
+        self.context_budget: Optional[int] = kwargs.get("context_budget")
+        self.history_compaction: str = kwargs.get("history_compaction") or "drop"
+        self.summary: Optional[Dict[str, str]] = None
+        self._history_lock = threading.Lock()
+        self._summarizer: Optional[ThreadPoolExecutor] = None
+
+        self.keep_alive: Optional[Union[float, str]] = kwargs.get("keep_alive")
+        self.options: Dict[str, Any] = kwargs.get("options") or {}
+        self.timeout: Optional[float] = kwargs.get("timeout")
+
+        cache_args = kwargs.get("response_cache")
+        self.response_cache = ResponseCache(**cache_args) if cache_args else None
+        self.last_response: Optional[CachedResponse] = None
+
         self.model = Client()
+        self.async_model = AsyncClient()
+
+    def _request_args(self, **options) -> Dict[str, Any]:
+        """
+        The arguments shared by every chat request.
+
+        Args:
+            **options: Model options to set on top of the configured ones.
+
+        Returns:
+            Keyword arguments for `Client.chat`.
+        """
+        return {"keep_alive": self.keep_alive, "options": {**self.options, **options} or None}
+
+    @staticmethod
+    def estimate_tokens(message: Dict[str, str]) -> int:
+        """
+        Approximate the number of tokens a message takes up in the prompt.
+
+        Args:
+            message: The chat message.
+
+        Returns:
+            About one token per four characters, plus a few tokens for the chat template.
+        """
+        return math.ceil(len(message["content"]) / 4) + 4
+
+    def history_tokens(self) -> int:
+        """
+        Approximate the number of tokens of the whole history.
+
+        Returns:
+            The estimated token count.
+        """
+        with self._history_lock:
+            return sum(self.estimate_tokens(message) for message in self.messages)
+
+    def _compact_history(self) -> None:
+        """
+        Remove the oldest turns until the history fits three quarters of the token budget.
+
+        The system prompt, the summary and the latest exchange are never removed. Removed turns are handed to the
+        background summarizer when summarization is enabled.
+        """
+        if not self.context_budget:
+            return
+
+        with self._history_lock:
+            pinned = int(bool(self.system_prompt)) + int(self.summary is not None)
+            tokens = sum(self.estimate_tokens(message) for message in self.messages)
+
+            if tokens <= self.context_budget:
+                return
+
+            evicted = []
+
+            while tokens > self.context_budget * 3 // 4 and len(self.messages) - pinned > 2:
+                message = self.messages.pop(pinned)
+                tokens -= self.estimate_tokens(message)
+                evicted.append(message)
+
+                # Never leave an assistant message without the user message it answers
+                while self.messages[pinned]["role"] != "user" and len(self.messages) - pinned > 2:
+                    message = self.messages.pop(pinned)
+                    tokens -= self.estimate_tokens(message)
+                    evicted.append(message)
+
+        if not evicted:
+            # Only the pinned messages and the latest exchange are left
+            return
+
+        print_system_message(f"Compacted {len(evicted)} old messages from the chat history.")
+
+        if self.history_compaction == "summarize":
+            if not self._summarizer:
+                self._summarizer = ThreadPoolExecutor(max_workers=1)
+
+            self._summarizer.submit(self._summarize, evicted)
+
+    def _summarize(self, evicted: List[Dict[str, str]]) -> None:
+        """
+        Fold compacted messages into the running summary. Runs on the background summarizer thread.
+
+        Args:
+            evicted: The messages removed from the history.
+        """
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in evicted)
+
+        if self.summary:
+            transcript = f"Earlier summary: {self.summary['content']}\n{transcript}"
+
+        try:
+            response = self.model.chat(
+                model=self.model_id,
+                messages=[{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": transcript}],
+                **self._request_args(),
+            )
+        except ResponseError:
+            return
+
+        content = f"Summary of the earlier conversation: {response['message']['content'].strip()}"
+
+        with self._history_lock:
+            if self.summary is None:
+                self.summary = {"role": "system", "content": content}
+                self.messages.insert(int(bool(self.system_prompt)), self.summary)
+            else:
+                self.summary["content"] = content
+
+    def close(self) -> None:
+        """
+        Stop the background summarizer without waiting for a summary still being generated.
+        """
+        if self._summarizer:
+            self._summarizer.shutdown(wait=False, cancel_futures=True)
+            self._summarizer = None
 
     def exists(self) -> bool:
         """
@@ -57,6 +226,87 @@ class LLM(BaseModel):
         except ResponseError:
             return False
 
+    def warm_up(self) -> None:
+        """
+        Load the model into memory and evaluate the system prompt, so that the first turn neither waits for the model
+        to load nor for its prompt prefix to be processed.
+        """
+        start = time.perf_counter()
+
+        try:
+            self.model.chat(
+                model=self.model_id,
+                messages=self.messages[:1] if self.system_prompt else [],
+                **self._request_args(num_predict=1),
+            )
+        except ResponseError as e:
+            print_system_message(f"LLM warm-up failed: {e}")
+            return
+
+        print_system_message(f"LLM warmed up in {time.perf_counter() - start:.2f}s")
+
+    def response_key(self, message: str) -> Optional[str]:
+        """
+        Compute the response cache key of a message in the current context.
+
+        Args:
+            message: The user input message.
+
+        Returns:
+            The cache key, or None if there is no response cache.
+        """
+        if not self.response_cache:
+            return None
+
+        with self._history_lock:
+            return self.response_cache.key(message, self.messages)
+
+    def _cached_response(self, message: str) -> Tuple[Optional[str], Optional[CachedResponse]]:
+        """
+        Look up the response to a message in the response cache, and remember it as `last_response`.
+
+        Args:
+            message: The user input message.
+
+        Returns:
+            The cache key, or None if there is no response cache, and the cached response, or None on a miss.
+        """
+        key = self.response_key(message)
+        self.last_response = self.response_cache.get(key) if self.response_cache and key else None
+
+        return key, self.last_response
+
+    def _start_request(self, message: str) -> List[Dict[str, str]]:
+        """
+        Add a user message to the history.
+
+        Args:
+            message: The user input message.
+
+        Returns:
+            A snapshot of the history to send with the request.
+        """
+        with self._history_lock:
+            self.messages.append({"role": "user", "content": message})
+
+            return list(self.messages)
+
+    def _finish_request(self, role: Optional[str], content: str) -> None:
+        """
+        Store a response in the history, or drop the user message if the chat history is disabled.
+
+        Args:
+            role: The role reported by the model, if any token was received.
+            content: The generated text.
+        """
+        with self._history_lock:
+            if self.is_chat_history_disabled:
+                self.messages.pop()
+            else:
+                self.messages.append({"role": role or "assistant", "content": content})
+
+        self._compact_history()
+
     def forward(self, message: str) -> Iterator[str]:
         """
         Generate text from user input using the specified LLM.
@@ -65,31 +315,230 @@ class LLM(BaseModel):
             message: The user input message.
 
         Returns:
-            An iterator that yields the generated text in chunks.
+            An iterator that yields the generated text in chunks. Closing it early aborts the request, and only the
+            text generated so far is kept in the history.
         """
-        self.messages.append({"role": "user", "content": message})
-
+        key, cached = self._cached_response(message)
+        messages = self._start_request(message)
         assistant_role = None
         generated_content = ""
+        tokens: List[str] = []
+
+        if cached:
+            try:
+                for token in cached.tokens:
+                    generated_content += token
+
+                    yield token
+            finally:
+                self._finish_request("assistant", generated_content)
+
+            return
 
         stream = self.model.chat(
             model=self.model_id,
-            messages=self.messages,
+            messages=messages,
             stream=True,
+            **self._request_args(),
         )
 
-        for chunk in stream:
-            # NOTE: `chunk["done"] == True` when ends
-            token = chunk["message"]["content"]
+        try:
+            for chunk in stream:
+                # NOTE: `chunk["done"] == True` when ends
+                token = chunk["message"]["content"]
+
+                if assistant_role is None:
+                    assistant_role = chunk["message"]["role"]
+
+                generated_content += token
+                tokens.append(token)
+
+                yield token
+
+            if self.response_cache and key:
+                self.last_response = self.response_cache.put(key, tokens)
+        finally:
+            # Closes the HTTP response when the generator is closed early, which stops generation on the server
+            if hasattr(stream, "close"):
+                stream.close()
+
+            self._finish_request(assistant_role, generated_content)
+
+    async def aforward(self, message: str, timeout: Optional[float] = None) -> AsyncGenerator[str, None]:
+        """
+        Generate text from user input without blocking the event loop.
+
+        Cancelling the consuming task, or closing the iterator, aborts the request on the server, even before the
+        first token has arrived. Only the text generated so far is kept in the history.
+
+        Args:
+            message: The user input message.
+            timeout: The maximum number of seconds to wait for each token, defaults to `timeout`.
+
+        Returns:
+            An asynchronous generator that yields the generated text in chunks.
+
+        Raises:
+            TimeoutError: If the server does not produce the next token in time.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        key, cached = self._cached_response(message)
+        messages = self._start_request(message)
+        assistant_role = None
+        generated_content = ""
+        tokens: List[str] = []
+        stream = None
+
+        if cached:
+            try:
+                for token in cached.tokens:
+                    generated_content += token
+
+                    yield token
+            finally:
+                self._finish_request("assistant", generated_content)
+
+            return
+
+        try:
+            stream = await self.async_model.chat(
+                model=self.model_id,
+                messages=messages,
+                stream=True,
+                **self._request_args(),
+            )
+
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(stream), timeout)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError as e:
+                    raise TimeoutError(f"No response from {self.model_id} within {timeout}s") from e
+
+                token = chunk["message"]["content"]
+
+                if assistant_role is None:
+                    assistant_role = chunk["message"]["role"]
+
+                generated_content += token
+                tokens.append(token)
+
+                yield token
+
+            if self.response_cache and key:
+                self.last_response = self.response_cache.put(key, tokens)
+        finally:
+            # ollama streams responses from an asynchronous generator, although it is typed as an iterator
+            if stream is not None:
+                await cast(AsyncGenerator, stream).aclose()
+
+            self._finish_request(assistant_role, generated_content)
 
-            if assistant_role is None:
-                assistant_role = chunk["message"]["role"]
+    def truncate_last_response(self, content: str) -> None:
+        """
+        Replace the last assistant message in the history with the part of it the user actually heard.
+
+        Args:
+            content: The delivered part of the response.
+        """
+        with self._history_lock:
+            if self.messages and self.messages[-1]["role"] == "assistant":
+                self.messages[-1]["content"] = content
+
+    def discard_last_request(self, message: str) -> None:
+        """
+        Remove the last exchange from the history, such as a speculative request whose input turned out different.
+
+        Args:
+            message: The user input message of the exchange, which is left alone if it is not the last one.
+        """
+        with self._history_lock:
+            if self.is_chat_history_disabled:
+                return
+
+            index = len(self.messages) - (2 if self.messages and self.messages[-1]["role"] == "assistant" else 1)
+
+            if index >= 0 and self.messages[index] == {"role": "user", "content": message}:
+                del self.messages[index:]
+
+
+class SpeculativeResponse:
+    """
+    A response requested before the user input is final, such as on a partial transcript.
+
+    The request starts right away, so the server processes the prompt while the input is being finalized, and the
+    generated tokens are buffered. Once the final input is known, the response is either consumed with `tokens`, or
+    discarded, which aborts the request and removes the exchange from the history.
+
+    Must be created and used on a single event loop.
+
+    Args:
+        llm: The Language Model.
+        message: The speculative user input message.
+        previous: A speculation being replaced, which is discarded before this one is requested so the history never
+            holds both.
+
+    Attributes:
+        llm: The Language Model.
+        message: The speculative user input message.
+    """
 
-            generated_content += token
+    def __init__(self, llm: LLM, message: str, previous: Optional["SpeculativeResponse"] = None) -> None:
+        self.llm = llm
+        self.message = message
 
+        self._response = llm.aforward(message)
+        self._tokens: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        self._is_requested = False
+        self._task = asyncio.get_running_loop().create_task(self._prefetch(previous))
+
+    async def _prefetch(self, previous: Optional["SpeculativeResponse"]) -> None:
+        """
+        Buffer the tokens of the response.
+
+        Args:
+            previous: A speculation to discard first.
+        """
+        try:
+            if previous:
+                await previous.discard()
+
+            self._is_requested = True
+
+            async for token in self._response:
+                self._tokens.put_nowait(token)
+        finally:
+            await self._response.aclose()
+            self._tokens.put_nowait(None)
+
+    async def tokens(self) -> AsyncGenerator[str, None]:
+        """
+        Consume the response, starting with the buffered tokens.
+
+        Returns:
+            An asynchronous generator that yields the generated text in chunks.
+
+        Raises:
+            TimeoutError: If the server does not produce the next token in time.
+        """
+        while (token := await self._tokens.get()) is not None:
             yield token
 
-        if self.is_chat_history_disabled:
-            self.messages.pop()
-        else:
-            self.messages.append({"role": assistant_role, "content": generated_content})
+        await self._task
+
+    async def aclose(self) -> None:
+        """
+        Abort the request if it is still running. The text generated so far is kept in the history.
+        """
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def discard(self) -> None:
+        """
+        Abort the request and remove the exchange from the history.
+        """
+        await self.aclose()
+
+        if self._is_requested:
+            self.llm.discard_last_request(self.message)
@@ -0,0 +1,114 @@
+"""
+Startup steps shared by the command line assistant and the WebSocket server.
+"""
+
+import asyncio
+import logging
+from json import loads
+from typing import IO, Any, Callable, Dict, Optional, Tuple, TypeVar, Union
+
+from colorama import Fore
+
+from ..settings import default_config, default_torch_device
+from ..tracing import Trace
+from ..utils import deep_merge_dicts, print_system_message
+from .llm import LLM
+from .stt import STT
+from .tts import TTS, TTSPool
+
+# A Text-to-Speech model running in this process or in a pool of worker processes
+SpeechModel = Union[TTS, TTSPool]
+
+ModelT = TypeVar("ModelT")
+
+
+def load_config(config_file: Optional[IO[str]]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """
+    Merge the user configuration into the default configuration.
+
+    Args:
+        config_file: The JSON configuration file, or None to use the defaults.
+
+    Returns:
+        The Language Model, Speech-to-Text and Text-to-Speech configurations. The latter two are empty dictionaries if
+        the model is disabled.
+    """
+    user_config = loads(config_file.read()) if config_file else {}
+    config = deep_merge_dicts(default_config, user_config)
+
+    return config["llm"], config.get("stt") or {}, config.get("tts") or {}
+
+
+async def check_llm(trace: Trace, llm_model: LLM) -> bool:
+    """
+    Check that the Language Model exists on the ollama server, and report it if it does not.
+
+    Args:
+        trace: The startup trace the check is recorded in.
+        llm_model: The Language Model.
+
+    Returns:
+        True if the model exists, False otherwise.
+    """
+    with trace.span("llm_check"):
+        llm_exists = await asyncio.to_thread(llm_model.exists)
+
+    if not llm_exists:
+        print_system_message(f"Invalid ollama model: {llm_model.model_id}", color=Fore.RED, log_level=logging.ERROR)
+
+    return llm_exists
+
+
+async def load_model(
+    trace: Trace, stage: str, model_class: Callable[..., ModelT], config: Dict[str, Any]
+) -> Optional[ModelT]:
+    """
+    Construct a model on a worker thread, so that several models can load at the same time.
+
+    Args:
+        trace: The startup trace the loading time is recorded in.
+        stage: The name of the span.
+        model_class: The model class.
+        config: The configuration of the model, or an empty dictionary if the model is disabled.
+
+    Returns:
+        The model, or None if it is disabled.
+    """
+    if not config:
+        return None
+
+    with trace.span(stage):
+        return await asyncio.to_thread(model_class, **config)
+
+
+async def load_speech_models(
+    trace: Trace, stt_config: Dict[str, Any], tts_config: Dict[str, Any]
+) -> Tuple[Optional[STT], Optional[SpeechModel]]:
+    """
+    Load the Speech-to-Text and Text-to-Speech models concurrently.
+
+    Args:
+        trace: The startup trace the loading times are recorded in.
+        stt_config: The Speech-to-Text configuration, or an empty dictionary if it is disabled.
+        tts_config: The Text-to-Speech configuration, or an empty dictionary if it is disabled.
+
+    Returns:
+        The Speech-to-Text and Text-to-Speech models, each None if it is disabled.
+    """
+    if stt_config or tts_config:
+        # Resolving the default device imports PyTorch, which is better done once than raced by the loader threads
+        with trace.span("torch_import"):
+            await asyncio.to_thread(default_torch_device)
+
+    tts_class: Callable[..., SpeechModel] = TTS
+
+    if tts_config.get("workers"):
+        tts_class = TTSPool
+
+    # Loading is dominated by file I/O and native code, so threads run it concurrently despite the GIL
+    stt_model, tts_model = await asyncio.gather(
+        load_model(trace, "stt_load", STT, stt_config),
+        load_model(trace, "tts_load", tts_class, tts_config),
+    )
+
+    return stt_model, tts_model
@@ -0,0 +1,87 @@
+"""
+This module provides a local store of prepared model artifacts, so that restarts do not resolve and rebuild models.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+
+
+class ModelStore:
+    """
+    A directory of prepared model artifacts, keyed by model identifier, device and preparation options.
+
+    Each entry is a directory holding whatever the model needs to load without contacting a model hub, such as
+    weights saved as safetensors (which are memory-mapped when loaded), and a manifest written once the entry is
+    complete. Entries without a manifest are incomplete and rebuilt.
+
+    Args:
+        directory: The directory of the store (default: 'june-va/models' in the user cache directory).
+
+    Attributes:
+        MANIFEST: The name of the file marking a complete entry.
+        directory: The directory of the store.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        if directory:
+            self.directory = os.path.expanduser(directory)
+        else:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            self.directory = os.path.join(cache_home, "june-va", "models")
+
+    def path(self, model_id: str, device: str, **variant: Any) -> str:
+        """
+        Compute the directory of an entry.
+
+        Args:
+            model_id: The identifier of the model.
+            device: The device the model is loaded on.
+            **variant: Further options the artifacts depend on, such as the backend.
+
+        Returns:
+            The path of the entry, which may not exist yet.
+        """
+        key = hashlib.sha256(json.dumps([model_id, device, variant], sort_keys=True).encode("utf-8")).hexdigest()
+        name = re.sub(r"[^\w.-]+", "_", model_id)
+
+        return os.path.join(self.directory, f"{name}-{key[:16]}")
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """
+        Read the manifest of an entry.
+
+        Args:
+            path: The path of the entry.
+
+        Returns:
+            The metadata stored with the entry, or None if the entry does not exist or is incomplete.
+        """
+        try:
+            with open(os.path.join(path, self.MANIFEST), encoding="utf-8") as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, path: str, **metadata: Any) -> None:
+        """
+        Mark an entry as complete once its artifacts have been written.
+
+        Args:
+            path: The path of the entry.
+            **metadata: JSON serializable values to store with the entry, such as resolved file paths.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial manifest
+        temp_path = os.path.join(path, f"{self.MANIFEST}.tmp")
+
+        with open(temp_path, "w", encoding="utf-8") as manifest_file:
+            json.dump({"created_at": time.time(), **metadata}, manifest_file)
+
+        os.replace(temp_path, os.path.join(path, self.MANIFEST))
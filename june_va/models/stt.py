@@ -1,33 +1,94 @@
 """
-This module provides a Speech-to-Text (STT) class for transcribing audio data into text using the Transformers library.
+This module provides a Speech-to-Text (STT) class for transcribing audio data into text, backed by either the
+Transformers library or faster-whisper (CTranslate2).
 """
 
+import os
 import warnings
-from typing import Dict, Union
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
 
+import numpy as np
 from numpy import ndarray
 
 from ..settings import settings
+from ..utils import print_system_message
 from .common import BaseModel
+from .store import ModelStore
 
 
-class STT(BaseModel):
+class STTBackend(ABC):
     """
-    A class for transcribing audio data into text using the Transformers library.
+    Base class for speech recognition engines used by `STT`.
+
+    Args:
+        model_id: The identifier or name of the model to be loaded.
+        device: The device on which the model should be loaded (e.g., 'cpu', 'cuda').
+        store: An optional store to keep prepared model artifacts in between runs.
+        **kwargs: Engine specific options taken from the 'backend_args' configuration.
+    """
+
+    def __init__(self, model_id: str, device: str, store: Optional[ModelStore] = None, **kwargs) -> None:
+        self.model_id = model_id
+        self.device = device
+        self.store = store
+
+    @abstractmethod
+    def transcribe(self, audio: Dict[str, Union[int, ndarray]], **generation_args) -> str:
+        """
+        Transcribe audio data into text.
+
+        Args:
+            audio: A dictionary with the float32 audio samples under 'raw' and their sample rate under 'sampling_rate'.
+            **generation_args: Engine specific inference arguments.
+
+        Returns:
+            The transcribed text.
+        """
+        ...
+
+    def transcribe_batch(self, audios: List[Dict[str, Union[int, ndarray]]], **generation_args) -> List[str]:
+        """
+        Transcribe several utterances. Engines that support batched inference override this to run them together.
+
+        Args:
+            audios: The utterances, in the format of `transcribe`.
+            **generation_args: Engine specific inference arguments.
+
+        Returns:
+            The transcribed texts, in the same order.
+        """
+        return [self.transcribe(audio, **generation_args) for audio in audios]
 
-    This class inherits from the BaseModel class and provides a method for running
-    the Speech-to-Text model on audio data.
+
+class TransformersBackend(STTBackend):
+    """
+    Speech recognition through the Hugging Face `automatic-speech-recognition` pipeline.
+
+    With a store, the pipeline resolved from the hub is saved there as safetensors on first use, and later runs load
+    it from the store, memory-mapping the weights, without resolving anything on the hub. Quantization is applied
+    again on every load, as a dynamically quantized model can only be restored by quantizing the full precision one.
 
     Args:
-        **kwargs: Keyword arguments for initializing the STT model, including optional
-            arguments like 'device', 'generation_args', and 'model'.
+        model_id: The identifier or name of the model to be loaded.
+        device: The device on which the model should be loaded (e.g., 'cpu', 'cuda').
+        store: An optional store to keep the resolved pipeline in between runs.
+        **kwargs: Optional 'quantize' flag that applies PyTorch dynamic int8 quantization to the linear layers of
+            the model, only effective on CPU, and 'compile' flag that compiles the audio encoder with
+            `torch.compile`. Compiled kernels are cached in the store.
 
     Attributes:
         model: An instance of the Transformers pipeline for automatic speech recognition.
     """
 
-    def __init__(self, **kwargs) -> None:
-        super().__init__(**kwargs)
+    def __init__(self, model_id: str, device: str, store: Optional[ModelStore] = None, **kwargs) -> None:
+        super().__init__(model_id, device, store, **kwargs)
+
+        store = self.store
+        store_path = store.path(model_id, device, backend="transformers") if store else None
+        is_stored = bool(store and store_path and store.get(store_path))
 
         with warnings.catch_warnings():
             # Ignore the `resume_download` warning raise by Hugging Face's underlying library
@@ -39,23 +100,392 @@ class STT(BaseModel):
                 "automatic-speech-recognition",
                 chunk_length_s=10,
                 device=self.device,
-                model=self.model_id,
+                model=store_path if is_stored else self.model_id,
                 token=settings.HF_TOKEN,
                 torch_dtype="auto",
                 trust_remote_code=True,
             )
 
+        if store and store_path and not is_stored:
+            self.model.save_pretrained(store_path, safe_serialization=True)
+            store.put(store_path, model_id=model_id, backend="transformers")
+
+        if kwargs.get("quantize") and self.device == "cpu":
+            import torch
+
+            self.model.model = torch.quantization.quantize_dynamic(
+                self.model.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+        if kwargs.get("compile"):
+            import torch
+
+            if store:
+                os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", os.path.join(store.directory, "inductor"))
+
+            whisper = self.model.model.model
+            whisper.encoder = torch.compile(whisper.encoder)
+
+    def transcribe(self, audio: Dict[str, Union[int, ndarray]], **generation_args) -> str:
+        # The pipeline consumes the input dictionary
+        transcription = self.model(dict(audio), **generation_args)
+
+        return transcription["text"]
+
+    def transcribe_batch(self, audios: List[Dict[str, Union[int, ndarray]]], **generation_args) -> List[str]:
+        # The pipeline batches list inputs by the 'batch_size' generation argument, and consumes the input dictionaries
+        transcriptions = self.model([dict(audio) for audio in audios], **generation_args)
+
+        return [transcription["text"] for transcription in transcriptions]
+
+
+class FasterWhisperBackend(STTBackend):
+    """
+    Speech recognition through faster-whisper, a CTranslate2 port of Whisper that runs quantized models on CPU.
+
+    Hugging Face Whisper identifiers such as 'openai/whisper-small.en' are mapped to the matching faster-whisper
+    model size, any other identifier is passed through as is.
+
+    Args:
+        model_id: The identifier or name of the model to be loaded.
+        device: The device on which the model should be loaded (e.g., 'cpu', 'cuda').
+        store: An optional store the converted model is downloaded to, and loaded from without contacting the hub
+            on later runs.
+        **kwargs: Optional 'compute_type' (default: 'int8' on CPU, 'float16' otherwise) and 'cpu_threads'.
+
+    Attributes:
+        model: An instance of `faster_whisper.WhisperModel`.
+    """
+
+    SAMPLING_RATE = 16000
+
+    def __init__(self, model_id: str, device: str, store: Optional[ModelStore] = None, **kwargs) -> None:
+        super().__init__(model_id, device, store, **kwargs)
+
+        from faster_whisper import WhisperModel
+
+        device_type, _, device_index = device.partition(":")
+
+        # CTranslate2 converts the weights at load time, so the downloaded files do not depend on the device
+        store = self.store
+        store_path = store.path(model_id, "any", backend="faster-whisper") if store else None
+        is_stored = bool(store and store_path and store.get(store_path))
+
+        self.model = WhisperModel(
+            model_id.removeprefix("openai/whisper-"),
+            compute_type=kwargs.get("compute_type") or ("int8" if device_type == "cpu" else "float16"),
+            cpu_threads=kwargs.get("cpu_threads", 0),
+            device=device_type,
+            device_index=int(device_index or 0),
+            download_root=store_path,
+            local_files_only=is_stored,
+        )
+
+        if store and store_path and not is_stored:
+            store.put(store_path, model_id=model_id, backend="faster-whisper")
+
+    def transcribe(self, audio: Dict[str, Union[int, ndarray]], **generation_args) -> str:
+        samples = np.asarray(audio["raw"], dtype=np.float32)
+
+        sampling_rate = int(audio["sampling_rate"])
+
+        if sampling_rate != self.SAMPLING_RATE:
+            length = round(len(samples) * self.SAMPLING_RATE / sampling_rate)
+            samples = np.interp(
+                np.linspace(0, len(samples) - 1, num=length),
+                np.arange(len(samples)),
+                samples,
+            ).astype(np.float32)
+
+        # Batching is handled by the Transformers pipeline only
+        generation_args.pop("batch_size", None)
+
+        segments, _ = self.model.transcribe(samples, **generation_args)
+
+        return "".join(segment.text for segment in segments)
+
+
+STT_BACKENDS: Dict[str, Type[STTBackend]] = {
+    "faster-whisper": FasterWhisperBackend,
+    "transformers": TransformersBackend,
+}
+
+
+class STT(BaseModel):
+    """
+    A class for transcribing audio data into text.
+
+    This class inherits from the BaseModel class and provides a method for running
+    the Speech-to-Text model on audio data. The recognition engine is selected by name from `STT_BACKENDS`.
+
+    Args:
+        **kwargs: Keyword arguments for initializing the STT model, including optional
+            arguments like 'backend', 'backend_args', 'device', 'generation_args', 'model', 'store' (see
+            `ModelStore`), 'streaming' and 'streaming_args'.
+
+    Attributes:
+        backend: The name of the recognition engine.
+        model: An instance of the selected `STTBackend`.
+        is_streaming_enabled: A flag indicating whether utterances should be transcribed while they are recorded.
+        streaming_args: Keyword arguments for `StreamingTranscriber`.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+
+        self.is_streaming_enabled: bool = bool(kwargs.get("streaming"))
+        self.streaming_args: Dict[str, Any] = kwargs.get("streaming_args") or {}
+
+        self.backend: str = kwargs.get("backend") or "transformers"
+
+        try:
+            backend_class = STT_BACKENDS[self.backend]
+        except KeyError as e:
+            raise ValueError(f"Unknown STT backend: {self.backend}") from e
+
+        store_args = kwargs.get("store")
+        store = ModelStore(**store_args) if store_args is not None else None
+
+        self.model = backend_class(self.model_id, self.device, store, **(kwargs.get("backend_args") or {}))
+
     def forward(self, audio: Dict[str, Union[int, ndarray]]) -> str:
         """
         Transcribe audio data into text using the Speech-to-Text model.
 
         Args:
             audio: A dictionary containing the audio data,
-                with a 'sample_rate' key for the sample rate (int) and an 'array' key for the audio array (np.ndarray).
+                with a 'sampling_rate' key for the sample rate (int) and a 'raw' key for the audio array (np.ndarray).
 
         Returns:
             The transcribed text from the audio data.
         """
-        transcription = self.model(audio, **self.generation_args)
+        transcription = self.model.transcribe(audio, **self.generation_args)
+
+        return transcription.strip()
+
+    def forward_batch(self, audios: List[Dict[str, Union[int, ndarray]]]) -> List[str]:
+        """
+        Transcribe several utterances in one pass of the Speech-to-Text model.
+
+        Args:
+            audios: The utterances, in the format of `forward`.
+
+        Returns:
+            The transcribed texts, in the same order.
+        """
+        transcriptions = self.model.transcribe_batch(audios, **self.generation_args)
+
+        return [transcription.strip() for transcription in transcriptions]
+
+    def stream(self, sampling_rate: int) -> "StreamingTranscriber":
+        """
+        Start transcribing a new utterance incrementally.
+
+        Args:
+            sampling_rate: The sample rate of the audio that will be fed.
+
+        Returns:
+            A transcriber to feed audio frames into as they are recorded.
+        """
+        return StreamingTranscriber(self, sampling_rate, **self.streaming_args)
+
+
+class StreamingTranscriber:
+    """
+    Transcribes an utterance incrementally while it is still being recorded.
+
+    Audio frames are accumulated as they arrive. Whenever the speaker pauses after enough audio has built up, the
+    pending segment is committed and transcribed on a background thread, and the uncommitted tail is periodically
+    re-transcribed to keep a partial hypothesis. Once speech ends only the tail after the last pause is left to
+    transcribe, so most of the recognition cost is hidden behind the user's own speaking time.
+
+    With `speculation_ms`, the utterance is also transcribed as soon as the speaker has paused that long, before the
+    end of speech is confirmed, and `on_speculation` receives the result so work depending on the transcript can
+    start early. If the speaker does not resume, the speculative transcription is reused for the final result, which
+    is then identical to it.
+
+    Args:
+        stt: The Speech-to-Text model used for transcription.
+        sampling_rate: The sample rate of the fed audio.
+        pause_ms: The length of the pause after which a segment may be committed (default: 300).
+        min_segment_s: The minimum duration of a committed segment, in seconds (default: 2.0).
+        partial_interval_s: How often the partial hypothesis of the tail is refreshed, in seconds (default: 1.0).
+        speculation_ms: The length of the pause after which the utterance is transcribed speculatively, shorter
+            than the hangover of the voice activity detector, or None to disable speculation (default: None).
+
+    Attributes:
+        stt: The Speech-to-Text model used for transcription.
+        sampling_rate: The sample rate of the fed audio.
+        committed: Futures of the committed segment transcriptions, in order.
+        partial: The latest hypothesis for the uncommitted tail.
+        on_speculation: An optional callback receiving the speculative transcription of the whole utterance, called
+            on the transcription thread.
+    """
+
+    def __init__(
+        self,
+        stt: STT,
+        sampling_rate: int,
+        pause_ms: int = 300,
+        min_segment_s: float = 2.0,
+        partial_interval_s: float = 1.0,
+        speculation_ms: Optional[int] = None,
+    ) -> None:
+        self.stt = stt
+        self.sampling_rate = sampling_rate
+        self.committed: List[Future] = []
+        self.partial = ""
+        self.on_speculation: Optional[Callable[[str], None]] = None
+
+        self._speculation_samples = sampling_rate * speculation_ms // 1000 if speculation_ms else None
+        self._speculation: Optional[Future] = None  # The speculative transcription of the tail, until speech resumes
+        self._is_speculation_committed = False
+        self._pause_samples = sampling_rate * pause_ms // 1000
+        self._min_segment_samples = int(sampling_rate * min_segment_s)
+        self._partial_interval_samples = int(sampling_rate * partial_interval_s)
+
+        self._tail: List[ndarray] = []
+        self._tail_samples = 0
+        self._tail_speech_end = 0  # Number of tail samples up to and including the last speech frame
+        self._silence_samples = 0
+        self._next_partial_at = self._partial_interval_samples
+        self._partial_job: Optional[Future] = None
+        self._segment = 0
+
+        # The model is not safe to call concurrently, so every transcription job runs on one worker
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def _transcribe(self, frames: List[ndarray]) -> str:
+        """
+        Transcribe a list of float32 frames.
+
+        Args:
+            frames: The frames to transcribe.
+
+        Returns:
+            The transcribed text.
+        """
+        raw = np.concatenate(frames)
+
+        return self.stt.forward({"raw": raw, "sampling_rate": self.sampling_rate})
+
+    def _update_partial(self, segment: int, future: Future) -> None:
+        """
+        Store the result of a partial transcription job, unless its segment has been committed since.
+
+        Args:
+            segment: The index of the segment the job transcribed.
+            future: The finished job.
+        """
+        if segment == self._segment and future.exception() is None:
+            self.partial = future.result()
+            print_system_message(f"Partial transcription: {self.text}")
+
+    def _update_speculation(self, future: Future) -> None:
+        """
+        Report the result of a speculative transcription, unless speech has resumed since.
+
+        Args:
+            future: The finished job.
+        """
+        if future is not self._speculation or future.cancelled() or future.exception() is not None:
+            return
+
+        # Every committed segment is done, as the jobs run in order on one worker
+        futures = [committed for committed in self.committed if committed is not future] + [future]
+        text = " ".join(text for text in (committed.result() for committed in futures) if text)
+
+        print_system_message(f"Speculative transcription: {text}")
+
+        on_speculation = self.on_speculation
+
+        if on_speculation:
+            on_speculation(text)
+
+    def _reset_tail(self) -> None:
+        """
+        Forget the uncommitted tail.
+        """
+        self._tail = []
+        self._tail_samples = 0
+        self._tail_speech_end = 0
+        self._next_partial_at = self._partial_interval_samples
+        self._segment += 1
+        self.partial = ""
+
+    @property
+    def text(self) -> str:
+        """
+        The best transcription of the utterance so far: every finished committed segment plus the partial tail.
+        """
+        texts = [future.result() for future in self.committed if future.done() and future.exception() is None]
+
+        return " ".join(text for text in [*texts, self.partial] if text)
+
+    def feed(self, frame: ndarray, is_speech: bool) -> None:
+        """
+        Append a recorded frame to the utterance.
+
+        Args:
+            frame: Mono float32 audio samples, as produced by `AudioPreprocessor`.
+            is_speech: Whether the voice activity detector classified the frame as speech.
+        """
+        self._tail.append(frame)
+        self._tail_samples += len(frame)
+
+        if is_speech:
+            self._silence_samples = 0
+            self._tail_speech_end = self._tail_samples
+
+            if self._speculation and not self._is_speculation_committed:
+                self._speculation.cancel()
+
+            self._speculation = None
+        else:
+            self._silence_samples += len(frame)
+
+        if (
+            self._speculation_samples is not None
+            and self._speculation is None
+            and self._tail_speech_end
+            and self._silence_samples >= self._speculation_samples
+        ):
+            self._speculation = self._executor.submit(self._transcribe, list(self._tail))
+            self._speculation.add_done_callback(self._update_speculation)
+            self._is_speculation_committed = False
+
+        if self._silence_samples >= self._pause_samples and self._tail_samples >= self._min_segment_samples:
+            if self._speculation and not self._is_speculation_committed:
+                # The speculation covers the same speech, so it serves as the transcription of the segment
+                self.committed.append(self._speculation)
+                self._is_speculation_committed = True
+            elif self._tail_speech_end:
+                self.committed.append(self._executor.submit(self._transcribe, self._tail))
+
+            self._reset_tail()
+        elif self._tail_samples >= self._next_partial_at and (self._partial_job is None or self._partial_job.done()):
+            self._next_partial_at = self._tail_samples + self._partial_interval_samples
+            self._partial_job = self._executor.submit(self._transcribe, list(self._tail))
+            self._partial_job.add_done_callback(partial(self._update_partial, self._segment))
+
+    def finalize(self) -> Tuple[str, bool]:
+        """
+        Transcribe the remaining tail and return the full transcription of the utterance.
+
+        Returns:
+            The transcribed text, and whether it is the speculative transcription, which `on_speculation` may not have
+            received yet when this returns.
+        """
+        is_speculative = self._speculation is not None
+
+        if self._speculation and not self._is_speculation_committed:
+            self.committed.append(self._speculation)
+        elif self._tail_speech_end:
+            # Drop trailing silence beyond one pause length
+            keep = min(self._tail_samples, self._tail_speech_end + self._pause_samples)
+            self.committed.append(self._executor.submit(self._transcribe, [np.hstack(self._tail)[:keep]]))
+
+        self._reset_tail()
+        self._executor.shutdown(wait=True)
 
-        return transcription["text"].strip()
+        return " ".join(text for text in (future.result() for future in self.committed) if text), is_speculative
@@ -1,10 +1,22 @@
 """
-This module provides a Text-to-Speech (TTS) class for generating speech from text using the TTS library.
+This module provides a Text-to-Speech (TTS) class for generating speech from text using the TTS library, and a pool of
+worker processes running it in parallel.
 """
 
-from typing import List
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
+
+from ..audio import to_pcm16
+from ..cache import SynthesisCache
+from ..utils import print_system_message
 from .common import BaseModel
+from .store import ModelStore
 
 
 class TTS(BaseModel):
@@ -14,13 +26,21 @@ class TTS(BaseModel):
     This class inherits from the BaseModel class and provides a method for running
     the Text-to-Speech model on text input.
 
+    With a store, the checkpoint and configuration files Coqui resolves for the model name are recorded there, and
+    later runs load them by path, skipping the model manager.
+
     Args:
         **kwargs: Keyword arguments for initializing the TTS model, including optional
-            arguments like 'device', 'generation_args', and 'model'.
+            arguments like 'cache', 'device', 'generation_args', 'model', 'store' (see `ModelStore`), 'streaming'
+            and 'streaming_args'.
 
     Attributes:
         model: An instance of the TTS model from the TTS library.
-        file_path: The file path where the generated audio should be saved.
+        sample_rate: The sample rate of the generated audio.
+        cache: An optional cache of synthesized speech, configured through the 'cache' keyword argument
+            (see `SynthesisCache`).
+        is_streaming_enabled: A flag indicating whether speech should be played while it is being generated.
+        streaming_args: Keyword arguments for the streaming inference of the model, such as 'stream_chunk_size'.
     """
 
     def __init__(self, **kwargs) -> None:
@@ -29,13 +49,52 @@ class TTS(BaseModel):
         # Disable additional splits, as they increase the likelihood of generation errors.
         self.generation_args["split_sentences"] = False
 
-        self.file_path: str = self.generation_args.get("file_path") or "out.wav"
-
         from TTS.api import TTS as CoquiTTS
 
-        self.model = CoquiTTS(self.model_id).to(self.device)
+        store_args = kwargs.get("store")
+        store = ModelStore(**store_args) if store_args is not None else None
+        store_path = store.path(self.model_id, "any", backend="coqui") if store else None
+        manifest = store.get(store_path) if store and store_path else None
+        paths = manifest["paths"] if manifest else None
+
+        if paths and all(os.path.exists(path) for path in paths.values() if path):
+            self.model = CoquiTTS(**paths).to(self.device)
+        else:
+            self.model = CoquiTTS(self.model_id).to(self.device)
+
+            if store and store_path and (paths := self._resolved_paths()):
+                store.put(store_path, model_id=self.model_id, paths=paths)
 
-    def forward(self, text: str) -> List[int]:
+        self.sample_rate: int = self.model.synthesizer.output_sample_rate
+
+        cache_args = kwargs.get("cache")
+        self.cache = SynthesisCache(self.model_id, self.generation_args, **cache_args) if cache_args else None
+
+        self.is_streaming_enabled: bool = bool(kwargs.get("streaming"))
+        self.streaming_args: Dict[str, Any] = kwargs.get("streaming_args") or {}
+        self._conditioning: Optional[Tuple[Any, Any]] = None
+
+    def _resolved_paths(self) -> Optional[Dict[str, Optional[str]]]:
+        """
+        The files the loaded model was read from.
+
+        Returns:
+            Keyword arguments to load the same model by path, or None for models spread over a directory (such as
+            XTTS), which Coqui can only load by name.
+        """
+        synthesizer = self.model.synthesizer
+
+        if getattr(synthesizer, "model_dir", None) or not getattr(synthesizer, "tts_checkpoint", None):
+            return None
+
+        return {
+            "model_path": synthesizer.tts_checkpoint,
+            "config_path": synthesizer.tts_config_path,
+            "vocoder_path": getattr(synthesizer, "vocoder_checkpoint", None) or None,
+            "vocoder_config_path": getattr(synthesizer, "vocoder_config", None) or None,
+        }
+
+    def forward(self, text: str) -> np.ndarray:
         """
         Generate speech from text using the Text-to-Speech model.
 
@@ -43,7 +102,312 @@ class TTS(BaseModel):
             text: The input text for which speech should be generated.
 
         Returns:
-            A list of integers representing the generated audio data.
+            The float32 samples of the generated audio.
+        """
+        wav = self.model.tts(text, **self.generation_args)
+
+        # Coqui returns a list with a Python object per sample, converted once into a compact buffer
+        if isinstance(wav, np.ndarray):
+            return wav.astype(np.float32, copy=False)
+
+        return np.fromiter(wav, dtype=np.float32, count=len(wav))
+
+    def synthesize(self, text: str) -> np.ndarray:
+        """
+        Generate speech from text as 16-bit PCM, serving repeated phrases from the cache without running the model.
+
+        Args:
+            text: The input text for which speech should be generated.
+
+        Returns:
+            The int16 PCM samples of the generated audio.
+        """
+        if self.cache:
+            pcm = self.cache.get(text)
+
+            if pcm is not None:
+                return pcm
+
+        pcm = to_pcm16(self.forward(text))
+
+        if self.cache and pcm.size:
+            self.cache.put(text, pcm)
+
+        return pcm
+
+    def _conditioning_latents(self) -> Tuple[Any, Any]:
+        """
+        The speaker conditioning of XTTS models, computed once from the 'speaker_wav' or 'speaker' generation argument.
+
+        Returns:
+            The GPT conditioning latent and the speaker embedding.
+
+        Raises:
+            ValueError: If neither argument is set, or the speaker is not one of the built-in speakers of the model.
+        """
+        if self._conditioning is None:
+            tts_model = self.model.synthesizer.tts_model
+            speaker_wav = self.generation_args.get("speaker_wav")
+            speaker = self.generation_args.get("speaker")
+
+            if speaker_wav:
+                self._conditioning = tts_model.get_conditioning_latents(audio_path=speaker_wav)
+            elif not speaker:
+                raise ValueError("Streaming XTTS speech requires the 'speaker_wav' or 'speaker' generation argument")
+            else:
+                try:
+                    self._conditioning = tuple(tts_model.speaker_manager.speakers[speaker].values())
+                except KeyError as e:
+                    raise ValueError(f"Unknown XTTS speaker: {speaker}") from e
+
+        return self._conditioning
+
+    def stream(self, text: str) -> Iterator[np.ndarray]:
         """
+        Generate speech from text as 16-bit PCM frames, yielding every frame as soon as it is generated.
+
+        Models with a streaming decoder (XTTS) yield frames while the rest of the text is still being synthesized.
+        Other models, and texts served from the cache, yield all of the audio as a single frame. Unlike `synthesize`,
+        frames are not peak-normalized, as the peak of the whole text is not known while it is being streamed, so
+        streamed audio is cached separately from synthesized audio.
+
+        Args:
+            text: The input text for which speech should be generated.
+
+        Yields:
+            The int16 PCM samples of consecutive frames.
+        """
+        tts_model = self.model.synthesizer.tts_model
+
+        if not hasattr(tts_model, "inference_stream"):
+            yield self.synthesize(text)
+            return
+
+        if self.cache:
+            pcm = self.cache.get(text, variant="stream")
+
+            if pcm is not None:
+                yield pcm
+                return
+
+        gpt_cond_latent, speaker_embedding = self._conditioning_latents()
+        frames: List[np.ndarray] = []
+
+        for chunk in tts_model.inference_stream(
+            text,
+            self.generation_args.get("language") or "en",
+            gpt_cond_latent,
+            speaker_embedding,
+            **self.streaming_args,
+        ):
+            frame = to_pcm16(chunk.cpu().numpy(), normalize=False)
+            frames.append(frame)
+
+            yield frame
+
+        if self.cache and frames:
+            self.cache.put(text, np.concatenate(frames), variant="stream")
+
+
+# The model of a pool worker process, loaded by `_initialize_worker`
+_worker_model: Optional[TTS] = None
+
+
+def _initialize_worker(config: Dict[str, Any], torch_threads: int) -> None:
+    """
+    Load the Text-to-Speech model in a pool worker process.
+
+    Args:
+        config: The keyword arguments for `TTS`.
+        torch_threads: The number of threads PyTorch may use in this process.
+    """
+    global _worker_model  # pylint: disable=global-statement
+
+    import torch
+
+    # Keep the workers from oversubscribing the cores between them
+    torch.set_num_threads(torch_threads)
+
+    _worker_model = TTS(**config)
+
+
+def _worker_sample_rate() -> int:
+    """
+    Report the sample rate of the model of a pool worker process.
+    """
+    assert _worker_model is not None
+
+    return _worker_model.sample_rate
 
-        return self.model.tts(text, **self.generation_args)
+
+def _worker_synthesize(text: str) -> Tuple[Optional[str], int]:
+    """
+    Synthesize a text in a pool worker process, and hand the PCM samples over through shared memory.
+
+    Args:
+        text: The input text.
+
+    Returns:
+        The name of the shared memory block holding the int16 samples and the number of samples, or None and 0 if no
+        audio was generated. The receiving process unlinks the block.
+    """
+    assert _worker_model is not None
+
+    pcm = _worker_model.synthesize(text)
+
+    if not pcm.size:
+        return None, 0
+
+    block = SharedMemory(create=True, size=pcm.nbytes)
+
+    try:
+        np.ndarray(pcm.shape, dtype=np.int16, buffer=block.buf)[:] = pcm
+    finally:
+        block.close()
+
+    return block.name, pcm.size
+
+
+class TTSPool:
+    """
+    A pool of worker processes that each hold a loaded Text-to-Speech model and synthesize chunks in parallel.
+
+    Synthesis in a single process is bound by the GIL for much of its Python overhead, so a pool raises throughput on
+    machines with many cores. Texts are sent to the workers and the PCM samples come back through shared memory
+    rather than being pickled. Every request returns its own future, so callers that consume the futures in
+    submission order, like the CLI and the server, preserve the order of the chunks. The synthesis cache lives in
+    this process and is checked before a text is sent to a worker.
+
+    Args:
+        **kwargs: Keyword arguments for `TTS`, plus 'workers', the number of processes (default: 2).
+
+    Attributes:
+        model_id: The identifier of the Text-to-Speech model.
+        device: The device the models are loaded on.
+        workers: The number of worker processes.
+        sample_rate: The sample rate of the generated audio.
+        cache: An optional cache of synthesized speech, configured through the 'cache' keyword argument.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        start = time.perf_counter()
+
+        self.model_id: str = kwargs["model"]
+        self.device: Optional[str] = kwargs.get("device")
+        self.workers: int = max(1, int(kwargs.get("workers") or 2))
+
+        # The workers must not keep caches of their own
+        worker_config = {key: value for key, value in kwargs.items() if key not in ("cache", "workers")}
+        torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_initialize_worker,
+            initargs=(worker_config, torch_threads),
+        )
+
+        # Start every worker now, so the models load in parallel at startup rather than on the first requests
+        sample_rates = [self._executor.submit(_worker_sample_rate) for _ in range(self.workers)]
+        self.sample_rate: int = sample_rates[0].result()
+
+        for future in sample_rates[1:]:
+            future.result()
+
+        # Mirror the generation arguments of `TTS` so cache entries are shared with in-process synthesis
+        generation_args = {**(kwargs.get("generation_args") or {}), "split_sentences": False}
+        cache_args = kwargs.get("cache")
+        self.cache = SynthesisCache(self.model_id, generation_args, **cache_args) if cache_args else None
+
+        print_system_message(
+            f"{self.__class__.__name__} initialized (model_id={self.model_id}; workers={self.workers}; "
+            f"load_time={time.perf_counter() - start:.2f}s)",
+        )
+
+    def submit(self, text: str) -> "Future[np.ndarray]":
+        """
+        Start synthesizing a text on a worker.
+
+        Args:
+            text: The input text.
+
+        Returns:
+            A future resolving to the int16 PCM samples. Cancelling it before a worker picks the text up skips it.
+        """
+        result: "Future[np.ndarray]" = Future()
+
+        if self.cache:
+            pcm = self.cache.get(text)
+
+            if pcm is not None:
+                result.set_result(pcm)
+
+                return result
+
+        job = self._executor.submit(_worker_synthesize, text)
+
+        def collect(job: "Future[Tuple[Optional[str], int]]") -> None:
+            if job.cancelled():
+                result.cancel()
+                return
+
+            try:
+                name, length = job.result()
+                pcm = self._receive(name, length)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                if result.set_running_or_notify_cancel():
+                    result.set_exception(e)
+
+                return
+
+            if self.cache and pcm.size:
+                self.cache.put(text, pcm)
+
+            if result.set_running_or_notify_cancel():
+                result.set_result(pcm)
+
+        job.add_done_callback(collect)
+        result.add_done_callback(lambda future: job.cancel() if future.cancelled() else None)
+
+        return result
+
+    @staticmethod
+    def _receive(name: Optional[str], length: int) -> np.ndarray:
+        """
+        Copy PCM samples out of the shared memory block of a worker, and release the block.
+
+        Args:
+            name: The name of the shared memory block, or None if no audio was generated.
+            length: The number of samples.
+
+        Returns:
+            The int16 PCM samples.
+        """
+        if name is None:
+            return np.zeros(0, dtype=np.int16)
+
+        block = SharedMemory(name=name)
+
+        try:
+            return np.ndarray((length,), dtype=np.int16, buffer=block.buf).copy()
+        finally:
+            block.close()
+            block.unlink()
+
+    def synthesize(self, text: str) -> np.ndarray:
+        """
+        Generate speech from text as 16-bit PCM on a worker, blocking until it is done.
+
+        Args:
+            text: The input text for which speech should be generated.
+
+        Returns:
+            The int16 PCM samples of the generated audio.
+        """
+        return self.submit(text).result()
+
+    def close(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,213 @@
+"""
+This module provides an incremental text segmenter that splits streamed LLM output into chunks for speech synthesis.
+"""
+
+from typing import List, Optional
+
+
+class TextSegmenter:
+    """
+    Split streamed text into chunks for the Text-to-Speech model as early as possible.
+
+    Text is fed piece by piece as the LLM generates it. A chunk boundary is a sentence or clause punctuation mark
+    followed by whitespace (closing quotes and brackets may sit in between), or a newline. Decimal numbers, common
+    abbreviations, initials and list enumerators are not treated as boundaries.
+
+    Thresholds are measured in characters. The first chunk only needs `first_chunk_chars` so speech can start while
+    the rest of the answer is generated; the target size then starts at `min_chunk_chars` and grows by `growth` for
+    every chunk, up to `max_chunk_chars`, which makes later chunks longer and reduces the number of short fragments
+    the TTS model struggles with. Sentence ends are accepted at half the target size, clause ends at the full target
+    size, and text without any boundary is split at the last space once it exceeds `max_chunk_chars`.
+
+    Args:
+        first_chunk_chars: The minimum size of the first chunk (default: 20).
+        min_chunk_chars: The target size of the second chunk (default: 60).
+        max_chunk_chars: The maximum target size, and the size at which a split is forced (default: 240).
+        growth: The factor by which the target size grows after each chunk (default: 1.5).
+
+    Attributes:
+        ABBREVIATIONS: Lowercase words that are not sentence ends when followed by a period.
+        CLAUSE_ENDS: Punctuation that ends a clause.
+        CLOSING_CHARS: Characters that may follow the punctuation of a boundary.
+        SENTENCE_ENDS: Punctuation that ends a sentence.
+    """
+
+    ABBREVIATIONS = frozenset(
+        {
+            "approx",
+            "dept",
+            "dr",
+            "e.g",
+            "etc",
+            "fig",
+            "i.e",
+            "inc",
+            "jr",
+            "ltd",
+            "mr",
+            "mrs",
+            "ms",
+            "mt",
+            "prof",
+            "sr",
+            "st",
+            "u.s",
+            "vs",
+        }
+    )
+    CLAUSE_ENDS = ",;:"
+    CLOSING_CHARS = "\"')]}’”"
+    SENTENCE_ENDS = ".!?"
+
+    def __init__(
+        self,
+        first_chunk_chars: int = 20,
+        min_chunk_chars: int = 60,
+        max_chunk_chars: int = 240,
+        growth: float = 1.5,
+    ) -> None:
+        self.first_chunk_chars = first_chunk_chars
+        self.min_chunk_chars = min_chunk_chars
+        self.max_chunk_chars = max_chunk_chars
+        self.growth = growth
+
+        self._buffer = ""
+        self._scan_from = 0
+        self._target: Optional[float] = None
+
+    def _is_sentence_end(self, index: int) -> bool:
+        """
+        Check whether the period at `index` ends a sentence rather than an abbreviation, initial or enumerator.
+
+        Args:
+            index: The position of the period in the buffer.
+
+        Returns:
+            True if the period ends a sentence, False otherwise.
+        """
+        line_start = self._buffer.rfind("\n", 0, index) + 1
+        words = self._buffer[line_start:index].split()
+
+        if not words:
+            return True
+
+        word = words[-1].lstrip("\"'([{‘“").lower()
+
+        if word in self.ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+            return False
+
+        # List enumerators such as "1." at the start of a line
+        if len(words) == 1 and word.isdigit():
+            return False
+
+        return True
+
+    def _find_boundary(self) -> Optional[int]:
+        """
+        Find the end of the next acceptable chunk in the buffer.
+
+        Returns:
+            The index just past the chunk, or None if no acceptable boundary has been seen yet.
+        """
+        target = self.first_chunk_chars if self._target is None else self._target
+        sentence_min = self.first_chunk_chars if self._target is None else target / 2
+        buffer = self._buffer
+        index = self._scan_from
+
+        while index < len(buffer):
+            char = buffer[index]
+
+            if char == "\n":
+                if buffer[:index].strip():
+                    return index + 1
+            elif char in self.SENTENCE_ENDS or char in self.CLAUSE_ENDS:
+                end = index + 1
+
+                while end < len(buffer) and buffer[end] in self.CLOSING_CHARS:
+                    end += 1
+
+                if end == len(buffer):
+                    # Wait for the next character to tell "3." from "3.5"
+                    return None
+
+                if buffer[end].isspace():
+                    size = len(buffer[:end].strip())
+
+                    if char in self.SENTENCE_ENDS:
+                        if size >= sentence_min and (char != "." or self._is_sentence_end(index)):
+                            return end
+                    elif size >= target:
+                        return end
+
+            index += 1
+            self._scan_from = index
+
+        if len(buffer.strip()) > self.max_chunk_chars:
+            split = buffer.rstrip().rfind(" ")
+
+            if split > 0:
+                return split
+
+        return None
+
+    def _take(self, end: int) -> str:
+        """
+        Remove the first `end` characters from the buffer and advance the target size.
+
+        Args:
+            end: The index just past the chunk.
+
+        Returns:
+            The chunk with surrounding whitespace removed.
+        """
+        chunk = self._buffer[:end].strip()
+        self._buffer = self._buffer[end:]
+        self._scan_from = 0
+
+        if chunk:
+            if self._target is None:
+                self._target = self.min_chunk_chars
+            else:
+                self._target = min(self.max_chunk_chars, self._target * self.growth)
+
+        return chunk
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Append generated text and return the chunks that are complete.
+
+        Args:
+            text: The next piece of generated text.
+
+        Returns:
+            The completed chunks, possibly empty.
+        """
+        self._buffer += text
+        chunks = []
+
+        while (end := self._find_boundary()) is not None:
+            if chunk := self._take(end):
+                chunks.append(chunk)
+
+        return chunks
+
+    def flush(self) -> Optional[str]:
+        """
+        Return whatever text is left once generation has finished, and reset the segmenter for the next response.
+
+        Returns:
+            The remaining chunk, or None if nothing is left.
+        """
+        chunk = self._buffer.strip()
+
+        self.reset()
+
+        return chunk or None
+
+    def reset(self) -> None:
+        """
+        Discard buffered text and start over with the first chunk policy.
+        """
+        self._buffer = ""
+        self._scan_from = 0
+        self._target = None
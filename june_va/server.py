@@ -0,0 +1,488 @@
+"""
+WebSocket server exposing the voice pipeline to many concurrent clients.
+
+The Speech-to-Text and Text-to-Speech models are loaded once and shared by every session, while each session has its
+own Language Model history. Requires the optional `websockets` package.
+
+Protocol, with JSON objects as text messages and audio as binary messages:
+
+- Client to server:
+    - `{"type": "start", "sample_rate": 16000}` starts an utterance, interrupting any response in progress. It is
+      followed by binary messages of mono 16-bit little-endian PCM at that sample rate, which are preprocessed for
+      Speech-to-Text as they arrive.
+    - `{"type": "end"}` ends the utterance, which is then transcribed and answered.
+    - `{"type": "text", "text": "..."}` answers typed input instead.
+    - `{"type": "interrupt", "heard": "..."}` stops the response in progress. The optional 'heard' text replaces the
+      stored response, so the history only holds what the user actually listened to.
+- Server to client:
+    - `{"type": "ready", "session": 1, "output_sample_rate": 22050}` once connected.
+    - `{"type": "transcript", "text": "..."}` with the transcription of an utterance.
+    - `{"type": "token", "text": "..."}` for every generated piece of text.
+    - `{"type": "audio", "index": 0, "text": "..."}` immediately followed by a binary message with the synthesized
+      speech of that chunk, as mono 16-bit little-endian PCM at the output sample rate.
+    - `{"type": "done"}` once the response has been sent in full, and `{"type": "error", "message": "..."}`.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from json import loads
+from typing import Any, Dict, Optional
+
+import click
+import numpy as np
+from colorama import Fore
+
+from . import __version__
+from .audio import AudioPreprocessor
+from .batching import MicroBatcher
+from .models import LLM, STT, TTSPool
+from .models.loader import SpeechModel, check_llm, load_config, load_speech_models
+from .segmenter import TextSegmenter
+from .tracing import Trace, Tracer
+from .utils import logger, print_system_message, run_main
+
+# Marker put on the chunk queue after the last chunk of a response
+END_OF_TURN = None
+
+
+class VoiceServer:
+    """
+    The models shared by all sessions.
+
+    Utterances of concurrent sessions are grouped into batches by a `MicroBatcher` in front of the Speech-to-Text
+    model, so it runs one batch at a time no matter how many sessions are active. Coqui models synthesize one text at
+    a time, so batching would only make every chunk of a batch wait for the others; chunks are instead synthesized
+    one after another on a single worker thread, or spread over the worker processes of a `TTSPool`.
+
+    Args:
+        llm_config: The configuration every session creates its Language Model from.
+        stt_model: The shared Speech-to-Text model, if any.
+        tts_model: The shared Text-to-Speech model, if any.
+        segmenter_config: Keyword arguments for the `TextSegmenter` of every session.
+        tracer: The tracer turn reports are emitted through.
+        stt_batching: Keyword arguments for the `MicroBatcher` of the Speech-to-Text model.
+        preprocessing: Keyword arguments for the `AudioPreprocessor` of received utterances.
+
+    Attributes:
+        llm_config: The configuration every session creates its Language Model from.
+        stt_model: The shared Speech-to-Text model, if any.
+        tts_model: The shared Text-to-Speech model, if any.
+        segmenter_config: Keyword arguments for the `TextSegmenter` of every session.
+        tracer: The tracer turn reports are emitted through.
+        preprocessing: Keyword arguments for the `AudioPreprocessor` of received utterances.
+        sessions: The connected sessions by identifier.
+    """
+
+    def __init__(
+        self,
+        llm_config: Dict[str, Any],
+        stt_model: Optional[STT],
+        tts_model: Optional[SpeechModel],
+        segmenter_config: Optional[Dict[str, Any]] = None,
+        tracer: Optional[Tracer] = None,
+        stt_batching: Optional[Dict[str, Any]] = None,
+        preprocessing: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.llm_config = llm_config
+        self.stt_model = stt_model
+        self.tts_model = tts_model
+        self.segmenter_config = segmenter_config or {}
+        self.tracer = tracer or Tracer()
+        self.preprocessing = preprocessing or {}
+        self.sessions: Dict[int, "Session"] = {}
+
+        self._ids = itertools.count(1)
+        self._stt_batcher: Optional[MicroBatcher[Dict[str, Any], str]] = None
+        self._tts_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+
+        if stt_model:
+            self._stt_batcher = MicroBatcher(stt_model.forward_batch, name="stt", **(stt_batching or {}))
+
+    async def transcribe(self, audio: Dict[str, Any]) -> str:
+        """
+        Transcribe an utterance with the shared Speech-to-Text model.
+
+        Args:
+            audio: A dictionary with the float32 samples under 'raw' and their sample rate under 'sampling_rate'.
+
+        Returns:
+            The transcription, or an empty string if there is no Speech-to-Text model.
+        """
+        if not self._stt_batcher:
+            return ""
+
+        return await self._stt_batcher.submit(audio)
+
+    async def synthesize(self, text: str) -> np.ndarray:
+        """
+        Synthesize a chunk of text with the shared Text-to-Speech model.
+
+        Args:
+            text: The text to synthesize.
+
+        Returns:
+            The int16 PCM samples, empty if there is no Text-to-Speech model.
+        """
+        if isinstance(self.tts_model, TTSPool):
+            return await asyncio.wrap_future(self.tts_model.submit(text))
+
+        if not self.tts_model:
+            return np.zeros(0, dtype=np.int16)
+
+        return await asyncio.get_running_loop().run_in_executor(self._tts_executor, self.tts_model.synthesize, text)
+
+    async def handle(self, websocket: Any) -> None:
+        """
+        Serve one client connection.
+
+        Args:
+            websocket: The connection of the client.
+        """
+        session_id = next(self._ids)
+        session = Session(self, websocket, session_id)
+        self.sessions[session_id] = session
+
+        print_system_message(f"Session {session_id} connected ({len(self.sessions)} active)")
+
+        try:
+            await session.run()
+        finally:
+            del self.sessions[session_id]
+            print_system_message(f"Session {session_id} disconnected ({len(self.sessions)} active)")
+
+    def close(self) -> None:
+        """
+        Stop the batcher and worker threads and processes without waiting for requests still running.
+        """
+        if self._stt_batcher:
+            self._stt_batcher.close()
+
+        self._tts_executor.shutdown(wait=False, cancel_futures=True)
+
+        if isinstance(self.tts_model, TTSPool):
+            self.tts_model.close()
+
+
+class Session:
+    """
+    A conversation with one client.
+
+    Args:
+        server: The server holding the shared models.
+        websocket: The connection of the client.
+        session_id: The identifier of the session.
+
+    Attributes:
+        server: The server holding the shared models.
+        websocket: The connection of the client.
+        session_id: The identifier of the session.
+        llm_model: The Language Model of the session, holding its chat history.
+        segmenter: The segmenter that splits responses into TTS chunks.
+        preprocessor: The preprocessor of the utterance being received.
+    """
+
+    def __init__(self, server: VoiceServer, websocket: Any, session_id: int) -> None:
+        self.server = server
+        self.websocket = websocket
+        self.session_id = session_id
+        self.llm_model = LLM(**server.llm_config)
+        self.segmenter = TextSegmenter(**server.segmenter_config)
+        self.preprocessor = AudioPreprocessor(16000, **server.preprocessing)
+
+        self._pending = b""  # A byte of a sample split across binary messages
+        self._turn: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, message: Dict[str, Any], payload: Optional[bytes] = None) -> None:
+        """
+        Send a JSON message, optionally followed by a binary message that no other message may come between.
+
+        Args:
+            message: The JSON message.
+            payload: The binary message.
+        """
+        async with self._send_lock:
+            await self.websocket.send(json.dumps(message))
+
+            if payload is not None:
+                await self.websocket.send(payload)
+
+    async def run(self) -> None:
+        """
+        Process the messages of the client until it disconnects.
+        """
+        output_sample_rate = self.server.tts_model.sample_rate if self.server.tts_model else None
+        await self.send({"type": "ready", "session": self.session_id, "output_sample_rate": output_sample_rate})
+
+        try:
+            async for message in self.websocket:
+                if isinstance(message, bytes):
+                    data = self._pending + message
+                    usable = len(data) - len(data) % 2
+                    self._pending = data[usable:]
+                    self.preprocessor.process(np.frombuffer(data[:usable], dtype="<i2"))
+                    continue
+
+                try:
+                    event = loads(message)
+                    event_type = event["type"]
+                except (KeyError, TypeError, ValueError):
+                    await self.send({"type": "error", "message": "Invalid message"})
+                    continue
+
+                if event_type == "start":
+                    await self.interrupt()
+                    sample_rate = int(event.get("sample_rate") or 16000)
+
+                    if sample_rate != self.preprocessor.input_rate:
+                        self.preprocessor = AudioPreprocessor(sample_rate, **self.server.preprocessing)
+
+                    self.preprocessor.reset()
+                    self._pending = b""
+                elif event_type == "end":
+                    raw = self.preprocessor.finish()
+                    self.preprocessor.reset()
+                    await self.start_turn(audio={"raw": raw, "sampling_rate": self.preprocessor.output_rate})
+                elif event_type == "text":
+                    await self.start_turn(text=str(event.get("text") or ""))
+                elif event_type == "interrupt":
+                    await self.interrupt(event.get("heard"))
+                else:
+                    await self.send({"type": "error", "message": f"Unknown message type: {event_type}"})
+        finally:
+            await self.interrupt()
+            self.llm_model.close()
+
+    async def start_turn(self, text: Optional[str] = None, audio: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Answer new input, interrupting the response in progress.
+
+        Args:
+            text: Typed input.
+            audio: A recorded utterance, used when there is no typed input.
+        """
+        await self.interrupt()
+
+        self._turn = asyncio.create_task(self.respond(text, audio), name=f"session-{self.session_id}")
+
+    async def interrupt(self, heard: Optional[str] = None) -> None:
+        """
+        Stop the response in progress, which also aborts its LLM request.
+
+        Args:
+            heard: The part of the response the user listened to, which replaces the stored response.
+        """
+        turn, self._turn = self._turn, None
+
+        if turn and not turn.done():
+            turn.cancel()
+            await asyncio.wait([turn])
+
+        if heard is not None:
+            self.llm_model.truncate_last_response(heard)
+
+    async def respond(self, text: Optional[str], audio: Optional[Dict[str, Any]]) -> None:
+        """
+        Transcribe the input if needed, then stream the response text and speech to the client.
+
+        Args:
+            text: Typed input.
+            audio: A recorded utterance, used when there is no typed input.
+        """
+        trace = self.server.tracer.start_turn()
+        trace.mark("session", session=self.session_id)
+
+        try:
+            if text is None and audio is not None:
+                trace.mark("speech_end")
+
+                with trace.span("stt"):
+                    text = await self.server.transcribe(audio)
+
+                await self.send({"type": "transcript", "text": text})
+
+            trace.mark("input_ready")
+
+            if text:
+                chunks: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+                speech = asyncio.create_task(self.speak(trace, chunks))
+
+                try:
+                    await self.generate(trace, text, chunks)
+                    await speech
+                finally:
+                    speech.cancel()
+
+            await self.send({"type": "done"})
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.exception("Session %d failed", self.session_id)
+
+            # The connection itself may be what failed
+            with contextlib.suppress(Exception):
+                await self.send({"type": "error", "message": str(e)})
+        finally:
+            self.server.tracer.finish_turn(trace)
+
+    async def generate(self, trace: Trace, text: str, chunks: "asyncio.Queue[Optional[str]]") -> None:
+        """
+        Stream the response to the client and queue its chunks for synthesis.
+
+        Args:
+            trace: The trace of the turn.
+            text: The user input.
+            chunks: The queue the chunks are put on, followed by `END_OF_TURN`.
+        """
+        trace.mark("llm_request")
+        response = self.llm_model.aforward(text)
+        token_count = 0
+
+        try:
+            async for token in response:
+                if not token_count:
+                    trace.mark("llm_first_token")
+
+                token_count += 1
+                await self.send({"type": "token", "text": token})
+
+                for chunk in self.segmenter.feed(token):
+                    chunks.put_nowait(chunk)
+
+            if last_chunk := self.segmenter.flush():
+                chunks.put_nowait(last_chunk)
+
+            trace.mark("llm_done")
+        finally:
+            await response.aclose()
+            self.segmenter.reset()
+            chunks.put_nowait(END_OF_TURN)
+
+    async def speak(self, trace: Trace, chunks: "asyncio.Queue[Optional[str]]") -> None:
+        """
+        Synthesize queued chunks and send them to the client in order.
+
+        Args:
+            trace: The trace of the turn.
+            chunks: The queue of chunks to speak, terminated by `END_OF_TURN`.
+        """
+        for index in itertools.count():
+            text = await chunks.get()
+
+            if text is END_OF_TURN:
+                break
+
+            if not self.server.tts_model:
+                continue
+
+            with trace.span("tts", chunk=index, chars=len(text)):
+                pcm = await self.server.synthesize(text)
+
+            if pcm.size:
+                if not index:
+                    trace.mark("playback_start", chunk=index)
+
+                await self.send(
+                    {"type": "audio", "index": index, "text": text}, pcm.astype("<i2", copy=False).tobytes()
+                )
+
+
+async def _real_main(**kwargs):
+    """
+    Load the models once and serve sessions until interrupted.
+
+    Args:
+        **kwargs: Arbitrary keyword arguments including config file, host and port.
+    """
+    try:
+        import websockets
+    except ImportError:
+        print_system_message(
+            "websockets not installed. Please install websockets to run the server.",
+            color=Fore.RED,
+            log_level=logging.ERROR,
+        )
+        return 1
+
+    tracer = Tracer(kwargs["trace"])
+    startup = Trace(0)
+
+    llm_config, stt_config, tts_config = load_config(kwargs["config"])
+
+    # Sessions create their own Language Models, this one only checks the model and loads it on the ollama server
+    llm_model = LLM(**llm_config)
+
+    try:
+        if not await check_llm(startup, llm_model):
+            return 2
+
+        with startup.span("llm_warm_up"):
+            await asyncio.to_thread(llm_model.warm_up)
+    finally:
+        llm_model.close()
+
+    stt_model, tts_model = await load_speech_models(startup, stt_config, tts_config)
+
+    server = VoiceServer(
+        llm_config,
+        stt_model,
+        tts_model,
+        tts_config.get("segmenter"),
+        tracer,
+        stt_config.get("batching"),
+        stt_config.get("preprocessing"),
+    )
+
+    startup.mark("ready")
+    tracer.finish_startup(startup)
+
+    try:
+        async with websockets.serve(server.handle, kwargs["host"], kwargs["port"], max_size=2**24):
+            print_system_message(
+                f"Serving on ws://{kwargs['host']}:{kwargs['port']}",
+                color=Fore.GREEN,
+                log_level=logging.INFO,
+            )
+
+            await asyncio.Future()
+    finally:
+        server.close()
+
+
+@click.command()
+@click.option(
+    "-c",
+    "--config",
+    help="Configuration file.",
+    nargs=1,
+    required=False,
+    type=click.File("r", encoding="utf-8"),
+)
+@click.option("--host", default="127.0.0.1", help="Address to listen on.")
+@click.option("-p", "--port", default=8765, help="Port to listen on.")
+@click.option(
+    "-t",
+    "--trace",
+    help="Append per-turn latency reports as JSON lines to this file.",
+    nargs=1,
+    required=False,
+    type=click.File("a", encoding="utf-8"),
+)
+@click.option(
+    "-v",
+    "--verbose",
+    help="Verbose mode.",
+    is_flag=True,
+)
+@click.version_option(__version__)
+def main(**kwargs):
+    """
+    Serve the voice assistant to local clients over WebSocket.
+    """
+    run_main(_real_main, **kwargs)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,9 @@
 This module defines the application settings using the Pydantic library.
 """
 
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from torch import cuda
 
 
 class Settings(BaseSettings):
@@ -15,7 +16,8 @@ class Settings(BaseSettings):
 
     Attributes:
         HF_TOKEN: The Hugging Face token for accessing models and resources.
-        TORCH_DEVICE: The device to use for PyTorch computations (e.g. 'cuda' or 'cpu').
+        TORCH_DEVICE: The device to use for PyTorch computations (e.g. 'cuda' or 'cpu'). Detected on first use when
+            empty (see `default_torch_device`).
     """
 
     model_config = SettingsConfigDict(
@@ -25,18 +27,67 @@ class Settings(BaseSettings):
     )
 
     HF_TOKEN: str = ""
-    TORCH_DEVICE: str = "cuda" if cuda.is_available() else "cpu"
+    TORCH_DEVICE: str = ""
 
 
 settings = Settings()
 
 
+@lru_cache(maxsize=None)
+def default_torch_device() -> str:
+    """
+    Resolve the device models are loaded on when none is configured.
+
+    PyTorch is only imported here, when a model actually needs a device, so that importing the package and running
+    commands such as `--help` stay fast.
+
+    Returns:
+        The 'TORCH_DEVICE' setting if set, otherwise 'cuda' if available and 'cpu' if not.
+    """
+    if settings.TORCH_DEVICE:
+        return settings.TORCH_DEVICE
+
+    try:
+        from torch import cuda
+    except ImportError:
+        return "cpu"
+
+    return "cuda" if cuda.is_available() else "cpu"
+
+
 default_config = {
-    "llm": {"disable_chat_history": False, "model": "llama3.1:8b-instruct-q4_0"},
+    "llm": {
+        "context_budget": 3072,
+        "disable_chat_history": False,
+        "history_compaction": "drop",
+        "keep_alive": "30m",
+        "model": "llama3.1:8b-instruct-q4_0",
+        "options": {"num_ctx": 4096},
+        "response_cache": None,
+        "timeout": 120,
+    },
     "stt": {
-        "device": settings.TORCH_DEVICE,
+        "backend": "transformers",
+        "barge_in": {"enabled": False, "min_speech_ms": 300},
+        "batching": {"max_batch_size": 8, "max_delay_ms": 10},
+        "device": None,
         "generation_args": {"batch_size": 8},
         "model": "openai/whisper-small.en",
+        "preprocessing": {"max_gain": 10.0, "output_rate": 16000, "target_peak": 0.9},
+        "store": {"directory": None},
+        "streaming": False,
+        "streaming_args": {"speculation_ms": None},
+        "vad": {"backend": "energy", "hangover_ms": 500, "pre_roll_ms": 300},
+    },
+    "tts": {
+        "cache": {"directory": None, "max_entries": 128},
+        "device": None,
+        "lookahead": 2,
+        "model": "tts_models/en/ljspeech/glow-tts",
+        "output_buffer_size": 2048,
+        "store": {"directory": None},
+        "streaming": False,
+        "streaming_args": {"stream_chunk_size": 20},
+        "workers": 0,
     },
-    "tts": {"device": settings.TORCH_DEVICE, "model": "tts_models/en/ljspeech/glow-tts"},
 }
@@ -0,0 +1,215 @@
+"""
+This module provides lightweight latency tracing for conversation turns.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from .utils import print_system_message
+
+
+class Trace:
+    """
+    A timeline of the events of a single conversation turn.
+
+    Events are stamped relative to the start of the turn and may be recorded from any thread.
+
+    Args:
+        turn: The sequence number of the turn.
+
+    Attributes:
+        turn: The sequence number of the turn.
+        started_at: The `time.perf_counter` value at the start of the turn.
+        events: The recorded events, each with a 'stage', a 't' offset in milliseconds and optional fields.
+    """
+
+    def __init__(self, turn: int) -> None:
+        self.turn = turn
+        self.started_at = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _now(self) -> float:
+        """
+        Milliseconds elapsed since the start of the turn.
+        """
+        return round((time.perf_counter() - self.started_at) * 1000, 2)
+
+    def mark(self, stage: str, **fields) -> None:
+        """
+        Record an instantaneous event.
+
+        Args:
+            stage: The name of the event.
+            **fields: Additional values to store with the event, such as a chunk index.
+        """
+        with self._lock:
+            self.events.append({"stage": stage, "t": self._now(), **fields})
+
+    @contextmanager
+    def span(self, stage: str, **fields) -> Iterator[None]:
+        """
+        Record an event covering the duration of the `with` block. The event is stamped with its start time.
+
+        Args:
+            stage: The name of the event.
+            **fields: Additional values to store with the event.
+        """
+        start = self._now()
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.events.append({"stage": stage, "t": start, "duration": round(self._now() - start, 2), **fields})
+
+    def first(self, stage: str) -> Optional[float]:
+        """
+        Return the time of the first event of a stage.
+
+        Args:
+            stage: The name of the event.
+
+        Returns:
+            The offset in milliseconds, or None if the stage was not recorded.
+        """
+        with self._lock:
+            return next((event["t"] for event in self.events if event["stage"] == stage), None)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Compute the headline latencies of the turn.
+
+        Returns:
+            A dictionary with 'time_to_first_token' (from LLM request to first token), 'time_to_first_audio'
+            (from end of speech, or from input for typed turns, to the start of playback) and 'total', in milliseconds.
+        """
+        request = self.first("llm_request")
+        first_token = self.first("llm_first_token")
+        first_audio = self.first("playback_start")
+        user_done = self.first("speech_end")
+
+        if user_done is None:
+            user_done = self.first("input_ready")
+
+        time_to_first_token = None
+        time_to_first_audio = None
+
+        if request is not None and first_token is not None:
+            time_to_first_token = round(first_token - request, 2)
+
+        if user_done is not None and first_audio is not None:
+            time_to_first_audio = round(first_audio - user_done, 2)
+
+        return {
+            "time_to_first_token": time_to_first_token,
+            "time_to_first_audio": time_to_first_audio,
+            "total": self._now(),
+        }
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Build the structured report of the turn.
+
+        Returns:
+            A JSON serializable dictionary with the turn number, the summary and the events in chronological order.
+        """
+        summary = self.summary()
+
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["t"])
+
+        return {"turn": self.turn, "summary": summary, "events": events}
+
+
+class Tracer:
+    """
+    Creates a `Trace` for every turn and emits a report when the turn is finished.
+
+    Reports are written as JSON lines to `output` when given, and logged as a table at debug level, which is visible
+    with `--verbose`.
+
+    Args:
+        output: An optional writable text file for JSON lines reports.
+
+    Attributes:
+        output: The file JSON lines reports are written to.
+        current: The trace of the turn in progress, if any.
+    """
+
+    def __init__(self, output: Optional[TextIO] = None) -> None:
+        self.output = output
+        self.current: Optional[Trace] = None
+        self._turns = 0
+
+    def start_turn(self) -> Trace:
+        """
+        Start tracing a new turn.
+
+        Returns:
+            The trace of the new turn.
+        """
+        self._turns += 1
+        self.current = Trace(self._turns)
+
+        return self.current
+
+    def _emit(self, title: str, report: Dict[str, Any]) -> None:
+        """
+        Write a report as a JSON line and log it as a table.
+
+        Args:
+            title: The first line of the table.
+            report: The report, as built by `Trace.report`.
+        """
+        if self.output:
+            self.output.write(json.dumps(report) + "\n")
+            self.output.flush()
+
+        lines = [title]
+
+        for event in report["events"]:
+            fields = {key: value for key, value in event.items() if key not in ("stage", "t", "duration")}
+            duration = f"{event['duration']:>9.1f}" if "duration" in event else " " * 9
+            extra = " ".join(f"{key}={value}" for key, value in fields.items())
+            lines.append(f"  {event['t']:>9.1f} {duration}  {event['stage']} {extra}".rstrip())
+
+        for key, value in report["summary"].items():
+            lines.append(f"  {key}: {'n/a' if value is None else f'{value:.1f}'}")
+
+        print_system_message("\n".join(lines), log_level=logging.DEBUG)
+
+    def finish_startup(self, trace: Trace) -> None:
+        """
+        Emit the report of the application startup.
+
+        The startup is traced like a turn numbered 0, with the loading of each component as a span. Its summary only
+        holds the 'total' time until the assistant was ready.
+
+        Args:
+            trace: The trace of the startup.
+        """
+        report = trace.report()
+        report["summary"] = {"total": report["summary"]["total"]}
+
+        self._emit("Startup timings (ms):", report)
+
+    def finish_turn(self, trace: Optional[Trace] = None) -> None:
+        """
+        Emit the report of a turn.
+
+        Args:
+            trace: The trace to report, defaults to the current one.
+        """
+        trace = trace or self.current
+
+        if trace is None:
+            return
+
+        report = trace.report()
+
+        self._emit(f"Turn {report['turn']} timings (ms):", report)
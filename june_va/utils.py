@@ -2,11 +2,12 @@
 This module provides utility classes and functions.
 """
 
+import asyncio
 import logging
 import os
 import sys
 import threading
-from typing import Any
+from typing import Any, Callable, Coroutine, Optional, TypeVar
 
 from colorama import Fore, Style
 
@@ -17,45 +18,88 @@ _handler.setFormatter(_formatter)
 logger.addHandler(_handler)
 logger.setLevel(logging.INFO)
 
+T = TypeVar("T")
 
-class ThreadSafeState:
+
+async def run_in_thread(func: Callable[..., T], *args: Any) -> T:
     """
-    A thread-safe class for managing a shared state value.
+    Run a blocking function on a daemon thread and await its result.
 
-    This class provides methods for setting and getting the value in a thread-safe manner
-    using a lock.
+    Unlike the default executor of the event loop, the thread does not keep the interpreter alive, so functions that
+    block on the keyboard or an audio device for an unbounded time never delay shutdown. If the awaiting task is
+    cancelled, the function keeps running and its result is discarded.
 
     Args:
-        value: The initial value of the shared state.
+        func: The function to run.
+        *args: The positional arguments for the function.
 
-    Attributes:
-        _value: The shared state value.
-        _lock: A lock object used for thread-safe access to the shared state.
+    Returns:
+        The return value of the function.
     """
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future = loop.create_future()
 
-    def __init__(self, value: Any) -> None:
-        self._value = value
-        self._lock = threading.Lock()
+    def resolve(result: Any, exception: Optional[BaseException]) -> None:
+        if future.done():
+            return
 
-    def set_value(self, value: Any) -> None:
-        """
-        Set the shared state value in a thread-safe manner.
+        if exception is None:
+            future.set_result(result)
+        else:
+            future.set_exception(exception)
 
-        Args:
-            value: The new value to set for the shared state.
-        """
-        with self._lock:
-            self._value = value
+    def target() -> None:
+        result, exception = None, None
 
-    def get_value(self) -> Any:
-        """
-        Get the shared state value in a thread-safe manner.
+        try:
+            result = func(*args)
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            exception = e
 
-        Returns:
-            The current value of the shared state.
-        """
-        with self._lock:
-            return self._value
+        try:
+            loop.call_soon_threadsafe(resolve, result, exception)
+        except RuntimeError:
+            # The event loop was closed while the function was running
+            ...
+
+    threading.Thread(target=target, daemon=True).start()
+
+    return await future
+
+
+def run_main(real_main: Callable[..., Coroutine[Any, Any, Any]], **kwargs: Any) -> None:
+    """
+    Run the asynchronous main function of a command until it returns or the user interrupts it.
+
+    Args:
+        real_main: The main function.
+        **kwargs: The command line options, including the verbose flag.
+    """
+    if kwargs["verbose"]:
+        logger.setLevel(logging.DEBUG)
+
+    try:
+        asyncio.run(real_main(**kwargs))
+    except KeyboardInterrupt:
+        ...
+
+
+def threadsafe_callback(loop: asyncio.AbstractEventLoop, callback: Callable[..., Any]) -> Callable[..., None]:
+    """
+    Wrap a callback so that calling it from any thread schedules it on an event loop.
+
+    Args:
+        loop: The event loop the callback runs on.
+        callback: The callback.
+
+    Returns:
+        A function passing its positional arguments to the callback on the event loop.
+    """
+
+    def schedule(*args: Any) -> None:
+        loop.call_soon_threadsafe(callback, *args)
+
+    return schedule
 
 
 class suppress_stdout_stderr:
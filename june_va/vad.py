@@ -0,0 +1,166 @@
+"""
+This module provides voice activity detectors (VAD) used to decide whether an audio frame contains speech.
+"""
+
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, Type
+
+import numpy as np
+
+
+class VAD(ABC):
+    """
+    Base class for voice activity detectors.
+
+    Detectors are fed consecutive mono int16 frames of equal duration and keep whatever state they need between calls.
+
+    Args:
+        sample_rate: The sample rate of the frames that will be classified.
+
+    Attributes:
+        sample_rate: The sample rate of the frames that will be classified.
+    """
+
+    def __init__(self, sample_rate: int) -> None:
+        self.sample_rate = sample_rate
+
+    @abstractmethod
+    def is_speech(self, frame: np.ndarray) -> bool:
+        """
+        Classify a single audio frame.
+
+        Args:
+            frame: Mono int16 audio samples.
+
+        Returns:
+            True if the frame contains speech, False otherwise.
+        """
+        ...
+
+
+class EnergyVAD(VAD):
+    """
+    An energy based detector that compares the RMS level of each frame against a tracked noise floor.
+
+    The noise floor follows the level of non-speech frames with exponential smoothing and drops immediately when the
+    room gets quieter, so the detector adapts to fans, hum and microphone gain without manual tuning. During speech
+    it slowly rises towards the quietest of the recent frames, so a stationary noise that starts above the speech
+    threshold is only classified as speech until the floor has caught up with it, while the pauses of actual speech
+    keep that minimum low.
+
+    Args:
+        sample_rate: The sample rate of the frames that will be classified.
+        **kwargs: Optional 'min_rms' (absolute RMS level below which a frame is never speech, default: 300),
+            'ratio' (how far above the noise floor speech must be, default: 3.0), 'adaptation' (the smoothing
+            factor of the noise floor, default: 0.05), 'speech_adaptation' (the smoothing factor of the noise floor
+            during speech, default: 0.02) and 'tracking_frames' (the number of recent frames whose minimum level the
+            noise floor rises towards during speech, default: 50).
+
+    Attributes:
+        min_rms: The absolute RMS level below which a frame is never speech.
+        ratio: How far above the noise floor the RMS level of a speech frame must be.
+        adaptation: The smoothing factor used to update the noise floor.
+        speech_adaptation: The smoothing factor used to raise the noise floor during speech.
+        noise_floor: The current noise floor estimate.
+    """
+
+    def __init__(self, sample_rate: int, **kwargs) -> None:
+        super().__init__(sample_rate)
+
+        self.min_rms: float = kwargs.get("min_rms", 300.0)
+        self.ratio: float = kwargs.get("ratio", 3.0)
+        self.adaptation: float = kwargs.get("adaptation", 0.05)
+        self.speech_adaptation: float = kwargs.get("speech_adaptation", 0.02)
+        self.noise_floor: float = self.min_rms / self.ratio
+        self._recent_rms: Deque[float] = deque(maxlen=max(1, kwargs.get("tracking_frames", 50)))
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        samples = frame.astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+        speech = rms > max(self.min_rms, self.noise_floor * self.ratio)
+        self._recent_rms.append(rms)
+
+        if not speech:
+            if rms < self.noise_floor:
+                self.noise_floor = rms
+            else:
+                self.noise_floor += self.adaptation * (rms - self.noise_floor)
+        else:
+            recent_minimum = min(self._recent_rms)
+
+            if recent_minimum > self.noise_floor:
+                self.noise_floor += self.speech_adaptation * (recent_minimum - self.noise_floor)
+
+        return speech
+
+
+class WebRTCVAD(VAD):
+    """
+    A detector backed by the WebRTC voice activity detector from the optional `webrtcvad` package.
+
+    Frames are resampled to 16 kHz and split into 30 ms windows, and the frame counts as speech when the majority of
+    its windows do.
+
+    Args:
+        sample_rate: The sample rate of the frames that will be classified.
+        **kwargs: Optional 'aggressiveness' (0-3, default: 2).
+
+    Attributes:
+        model: An instance of `webrtcvad.Vad`.
+    """
+
+    MODEL_RATE = 16000
+    WINDOW = 480  # 30 ms at 16 kHz
+
+    def __init__(self, sample_rate: int, **kwargs) -> None:
+        super().__init__(sample_rate)
+
+        import webrtcvad
+
+        self.model = webrtcvad.Vad(kwargs.get("aggressiveness", 2))
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        if self.sample_rate != self.MODEL_RATE:
+            length = round(len(frame) * self.MODEL_RATE / self.sample_rate)
+            positions = np.linspace(0, len(frame) - 1, num=length)
+            frame = np.interp(positions, np.arange(len(frame)), frame).astype(np.int16)
+
+        windows = [frame[i : i + self.WINDOW] for i in range(0, len(frame) - self.WINDOW + 1, self.WINDOW)]
+
+        if not windows:
+            return False
+
+        votes = sum(self.model.is_speech(window.tobytes(), self.MODEL_RATE) for window in windows)
+
+        return votes * 2 > len(windows)
+
+
+VAD_BACKENDS: Dict[str, Type[VAD]] = {
+    "energy": EnergyVAD,
+    "webrtc": WebRTCVAD,
+}
+
+
+def create_vad(sample_rate: int, backend: str = "energy", **kwargs) -> VAD:
+    """
+    Create a voice activity detector by backend name.
+
+    Args:
+        sample_rate: The sample rate of the frames that will be classified.
+        backend: The name of a registered backend (see `VAD_BACKENDS`).
+        **kwargs: Detector specific options.
+
+    Returns:
+        The voice activity detector.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    try:
+        vad_class = VAD_BACKENDS[backend]
+    except KeyError as e:
+        raise ValueError(f"Unknown VAD backend: {backend}") from e
+
+    return vad_class(sample_rate, **kwargs)
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+from june_va.audio import AudioPreprocessor, _CaptureBuffer
+
+
+def block(start: int, count: int) -> bytes:
+    """
+    Consecutive int16 samples, so that every sample equals its position in the capture.
+    """
+    return np.arange(start, start + count, dtype=np.int16).tobytes()
+
+
+def speech(count: int, offset: int = 0) -> np.ndarray:
+    """
+    Captured int16 samples of a 440 Hz tone at 24 kHz, shifted by a DC offset.
+    """
+    tone = 8000 * np.sin(2 * np.pi * 440 * np.arange(count) / 24000)
+
+    return (tone + offset).astype(np.int16)
+
+
+def test_capture_buffer_grows_when_full():
+    buffer = _CaptureBuffer(4)
+
+    for start in range(0, 30, 3):
+        buffer.write(block(start, 3))
+
+    assert buffer.end == 30
+    assert np.array_equal(buffer.view(0, 30), np.arange(30))
+
+
+def test_capture_buffer_reads_samples_by_position():
+    buffer = _CaptureBuffer(8)
+    buffer.write(block(0, 6))
+
+    assert np.array_equal(buffer.read(2, 3), [2, 3, 4])
+    assert buffer.read(4, 3, timeout=0.01) is None
+
+
+def test_capture_buffer_keeps_samples_after_discarded_position():
+    buffer = _CaptureBuffer(8)
+    buffer.write(block(0, 6))
+
+    buffer.discard(2)
+
+    assert np.array_equal(buffer.view(2, 6), [2, 3, 4, 5])
+
+
+def test_capture_buffer_wraps_around_without_growing():
+    buffer = _CaptureBuffer(16)
+
+    # Keep a pre-roll of 4 samples while waiting for speech
+    for start in range(0, 400, 4):
+        buffer.write(block(start, 4))
+        buffer.discard(buffer.end - 4)
+
+        assert np.array_equal(buffer.view(buffer.end - 4, buffer.end), np.arange(start, start + 4))
+
+    assert len(buffer._samples) == 16
+
+
+def test_capture_buffer_clear_drops_all_samples():
+    buffer = _CaptureBuffer(8)
+    buffer.write(block(0, 6))
+
+    buffer.clear()
+    buffer.write(block(6, 4))
+
+    assert buffer.start == 6
+    assert np.array_equal(buffer.view(6, 10), [6, 7, 8, 9])
+
+
+@pytest.mark.parametrize("input_rate", [16000, 24000, 44100])
+def test_preprocessor_output_does_not_depend_on_chunks(input_rate):
+    pcm = speech(input_rate // 2, offset=1000)
+    whole = AudioPreprocessor(input_rate).process(pcm).copy()
+    preprocessor = AudioPreprocessor(input_rate)
+
+    chunked = np.concatenate([preprocessor.process(pcm[start : start + 317]) for start in range(0, len(pcm), 317)])
+
+    np.testing.assert_allclose(chunked, whole, atol=1e-5)
+
+
+@pytest.mark.parametrize("input_rate", [16000, 24000, 44100, 48000])
+def test_preprocessor_output_length_matches_input_duration(input_rate):
+    preprocessor = AudioPreprocessor(input_rate)
+
+    for start in range(0, 2 * input_rate, 960):
+        preprocessor.process(speech(960)[: 2 * input_rate - start])
+
+    assert len(preprocessor.finish()) == 32000
+
+
+def test_preprocessor_keeps_requested_length():
+    preprocessor = AudioPreprocessor(24000)
+    preprocessor.process(speech(24000))
+
+    assert len(preprocessor.finish(12000)) == 8000
+
+
+def test_preprocessor_removes_dc_offset():
+    preprocessor = AudioPreprocessor(16000, target_peak=None)
+    preprocessor.process(speech(48000, offset=3000))
+
+    samples = preprocessor.finish()
+
+    # The offset of about 0.09 has decayed after five time constants
+    assert abs(np.mean(samples[-8000:])) < 2e-3
+    assert np.max(np.abs(samples[-8000:])) < 0.26
+
+
+def test_preprocessor_normalizes_into_a_new_array():
+    preprocessor = AudioPreprocessor(16000, target_peak=0.9)
+    view = preprocessor.process(speech(16000))
+    unscaled = view.copy()
+
+    samples = preprocessor.finish()
+
+    assert np.max(np.abs(samples)) == pytest.approx(0.9)
+    assert np.array_equal(view, unscaled)
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+from typing import List
+
+from june_va.batching import MicroBatcher
+
+
+class Recorder:
+    """
+    A batch function doubling its inputs and recording every batch it runs.
+    """
+
+    def __init__(self) -> None:
+        self.batches: List[List[int]] = []
+
+    def __call__(self, items: List[int]) -> List[int]:
+        self.batches.append(items)
+
+        return [item * 2 for item in items]
+
+
+def test_requests_within_the_window_run_as_one_batch():
+    recorder = Recorder()
+
+    async def run():
+        batcher = MicroBatcher(recorder, max_batch_size=8, max_delay_ms=50)
+
+        try:
+            return await asyncio.gather(*(batcher.submit(item) for item in range(3)))
+        finally:
+            batcher.close()
+
+    assert asyncio.run(run()) == [0, 2, 4]
+    assert recorder.batches == [[0, 1, 2]]
+
+
+def test_full_batch_is_dispatched_before_the_window_closes():
+    recorder = Recorder()
+
+    async def run():
+        # A window far longer than the test makes any wait for it a timeout
+        batcher = MicroBatcher(recorder, max_batch_size=2, max_delay_ms=60000)
+
+        try:
+            return await asyncio.wait_for(asyncio.gather(batcher.submit(1), batcher.submit(2)), 5)
+        finally:
+            batcher.close()
+
+    assert asyncio.run(run()) == [2, 4]
+    assert recorder.batches == [[1, 2]]
+
+
+def test_requests_arriving_during_a_batch_form_the_next_batch():
+    recorder = Recorder()
+    started = threading.Event()
+    release = threading.Event()
+
+    def process(items: List[int]) -> List[int]:
+        started.set()
+        release.wait(5)
+
+        return recorder(items)
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=8, max_delay_ms=1)
+
+        try:
+            first = asyncio.ensure_future(batcher.submit(1))
+            await asyncio.to_thread(started.wait, 5)
+            rest = [asyncio.ensure_future(batcher.submit(item)) for item in (2, 3)]
+            await asyncio.sleep(0.05)
+            release.set()
+
+            return await asyncio.gather(first, *rest)
+        finally:
+            batcher.close()
+
+    assert asyncio.run(run()) == [2, 4, 6]
+    assert recorder.batches == [[1], [2, 3]]
+
+
+def test_cancelled_requests_are_dropped_from_the_batch():
+    recorder = Recorder()
+
+    async def run():
+        batcher = MicroBatcher(recorder, max_batch_size=8, max_delay_ms=50)
+
+        try:
+            cancelled = asyncio.ensure_future(batcher.submit(1))
+            kept = asyncio.ensure_future(batcher.submit(2))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+
+            return await kept
+        finally:
+            batcher.close()
+
+    assert asyncio.run(run()) == 4
+    assert recorder.batches == [[2]]
+
+
+def test_batch_errors_are_raised_by_every_request():
+    def fail(items: List[int]) -> List[int]:
+        raise RuntimeError("model failed")
+
+    async def run():
+        batcher = MicroBatcher(fail, max_delay_ms=1)
+
+        try:
+            return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        finally:
+            batcher.close()
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(results) == 2
@@ -0,0 +1,131 @@
+import os
+import time
+
+import numpy as np
+
+from june_va.cache import LRUCache, ResponseCache, SynthesisCache
+
+
+def test_lru_cache_evicts_least_recently_used_entry():
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_pop_removes_entry():
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    assert cache.get("a") is None
+
+
+def test_synthesis_cache_normalizes_text():
+    cache = SynthesisCache("model", {})
+    cache.put("Hello   world", np.arange(4, dtype=np.int16))
+
+    assert np.array_equal(cache.get(" Hello world "), np.arange(4))
+    assert cache.get("Hello world!") is None
+
+
+def test_synthesis_cache_keys_depend_on_model_arguments_and_variant():
+    cache = SynthesisCache("model", {"speaker": "a"})
+    other = SynthesisCache("model", {"speaker": "b"})
+
+    assert cache.key("Hello") != other.key("Hello")
+    assert cache.key("Hello") != cache.key("Hello", variant="stream")
+
+
+def test_synthesis_cache_evicts_from_memory():
+    cache = SynthesisCache("model", {}, max_entries=1)
+    cache.put("one", np.ones(2, dtype=np.int16))
+    cache.put("two", np.ones(2, dtype=np.int16))
+
+    assert cache.get("one") is None
+    assert cache.get("two") is not None
+
+
+def test_synthesis_cache_reloads_entries_from_disk(tmp_path):
+    SynthesisCache("model", {}, directory=str(tmp_path)).put("Hello", np.arange(5, dtype=np.int16))
+
+    cache = SynthesisCache("model", {}, directory=str(tmp_path))
+
+    assert np.array_equal(cache.get("Hello"), np.arange(5))
+
+
+def test_synthesis_cache_evicts_least_recently_used_files(tmp_path):
+    cache = SynthesisCache("model", {}, max_entries=1, directory=str(tmp_path), max_disk_entries=2)
+
+    for text in ("one", "two", "three"):
+        cache.put(text, np.ones(2, dtype=np.int16))
+
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{cache.key(text)}.pcm" for text in ("two", "three"))
+    assert cache.get("one") is None
+
+
+def test_synthesis_cache_keeps_memory_entry_when_disk_write_fails(tmp_path):
+    cache = SynthesisCache("model", {}, directory=str(tmp_path))
+    os.rmdir(tmp_path)
+
+    cache.put("Hello", np.arange(3, dtype=np.int16))
+
+    assert np.array_equal(cache.get("Hello"), np.arange(3))
+
+
+def test_response_cache_normalizes_input():
+    cache = ResponseCache()
+
+    assert cache.key("What time is it?", []) == cache.key("  what TIME is it", [])
+    assert cache.key("What time is it?", []) != cache.key("What day is it?", [])
+
+
+def test_response_cache_keys_depend_on_context():
+    cache = ResponseCache()
+    system = [{"role": "system", "content": "You are a helpful assistant."}]
+
+    assert cache.key("Hello", []) != cache.key("Hello", system)
+
+
+def test_response_cache_returns_stored_response():
+    cache = ResponseCache()
+    response = cache.put(cache.key("Hello", []), ["Hi", " there!"])
+
+    assert cache.get(cache.key("hello", [])) is response
+    assert response.tokens == ["Hi", " there!"]
+
+
+def test_response_cache_expires_entries(monkeypatch):
+    cache = ResponseCache(ttl_s=60)
+    key = cache.key("Hello", [])
+    response = cache.put(key, ["Hi!"])
+
+    monkeypatch.setattr(time, "time", lambda: response.created_at + 30)
+    assert cache.get(key) is response
+
+    monkeypatch.setattr(time, "time", lambda: response.created_at + 61)
+    assert cache.get(key) is None
+    assert cache.memory.get(key) is None
+
+
+def test_response_cache_evicts_least_recently_used_entry():
+    cache = ResponseCache(max_entries=2)
+    keys = [cache.key(text, []) for text in ("one", "two", "three")]
+    cache.put(keys[0], ["1"])
+    cache.put(keys[1], ["2"])
+
+    assert cache.get(keys[0]) is not None
+
+    cache.put(keys[2], ["3"])
+
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
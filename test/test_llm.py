@@ -0,0 +1,35 @@
+import pytest
+
+from june_va.models.llm import LLM
+
+
+@pytest.mark.parametrize("system_prompt", [None, "You are a helpful assistant."])
+def test_discard_last_request_removes_partial_exchange(system_prompt):
+    llm = LLM(model="llama3.1:8b-instruct-q4_0", system_prompt=system_prompt)
+    history = list(llm.messages)
+    llm.messages += [{"role": "user", "content": "What is the"}, {"role": "assistant", "content": "The"}]
+
+    llm.discard_last_request("What is the")
+
+    assert llm.messages == history
+
+
+@pytest.mark.parametrize("system_prompt", [None, "You are a helpful assistant."])
+def test_discard_last_request_removes_unanswered_message(system_prompt):
+    llm = LLM(model="llama3.1:8b-instruct-q4_0", system_prompt=system_prompt)
+    history = list(llm.messages)
+    llm.messages.append({"role": "user", "content": "What is the"})
+
+    llm.discard_last_request("What is the")
+
+    assert llm.messages == history
+
+
+def test_discard_last_request_keeps_other_exchange():
+    llm = LLM(model="llama3.1:8b-instruct-q4_0")
+    llm.messages += [{"role": "user", "content": "Hello"}, {"role": "assistant", "content": "Hi!"}]
+    history = list(llm.messages)
+
+    llm.discard_last_request("What is the")
+
+    assert llm.messages == history
@@ -0,0 +1,103 @@
+from typing import List
+
+from june_va.segmenter import TextSegmenter
+
+
+def segment(segmenter: TextSegmenter, text: str, piece_size: int = 1) -> List[str]:
+    """
+    Feed text to a segmenter in pieces the way an LLM streams it, and collect every chunk including the rest.
+    """
+    chunks = []
+
+    for index in range(0, len(text), piece_size):
+        chunks.extend(segmenter.feed(text[index : index + piece_size]))
+
+    if rest := segmenter.flush():
+        chunks.append(rest)
+
+    return chunks
+
+
+def test_first_chunk_ends_at_first_sentence_end_after_first_chunk_chars():
+    segmenter = TextSegmenter(first_chunk_chars=10)
+
+    assert segmenter.feed("Hi. Sure thing! The answer") == ["Hi. Sure thing!"]
+    assert segmenter.flush() == "The answer"
+
+
+def test_first_chunk_ends_at_clause_end_after_first_chunk_chars():
+    segmenter = TextSegmenter(first_chunk_chars=10, min_chunk_chars=100)
+
+    assert segmenter.feed("Well, first of all, this works, ") == ["Well, first of all,"]
+    assert segmenter.feed("I think. Next") == []
+
+
+def test_decimal_numbers_are_not_boundaries():
+    segmenter = TextSegmenter(first_chunk_chars=5)
+
+    assert segment(segmenter, "It costs 3.5 dollars today. Really.") == ["It costs 3.5 dollars today.", "Really."]
+
+
+def test_period_at_end_of_fed_text_waits_for_next_character():
+    segmenter = TextSegmenter(first_chunk_chars=5)
+
+    assert segmenter.feed("The value is 3.") == []
+    assert segmenter.feed("5 exactly. More") == ["The value is 3.5 exactly."]
+
+
+def test_abbreviations_and_initials_are_not_boundaries():
+    segmenter = TextSegmenter(first_chunk_chars=5)
+    text = "Ask Dr. Smith about J. R. R. Tolkien etc. and Mt. Fuji e.g. today. Done."
+
+    assert segment(segmenter, text) == ["Ask Dr. Smith about J. R. R. Tolkien etc. and Mt. Fuji e.g. today.", "Done."]
+
+
+def test_no_ends_a_sentence():
+    segmenter = TextSegmenter(first_chunk_chars=2)
+
+    assert segment(segmenter, "No. He did not go there.") == ["No.", "He did not go there."]
+
+
+def test_list_enumerators_are_not_boundaries():
+    segmenter = TextSegmenter(first_chunk_chars=5, min_chunk_chars=5)
+    text = "Steps:\n1. Boil the water.\n2. Add the pasta.\n"
+
+    assert segment(segmenter, text) == ["Steps:", "1. Boil the water.", "2. Add the pasta."]
+
+
+def test_target_size_grows_after_each_chunk():
+    segmenter = TextSegmenter(first_chunk_chars=5, min_chunk_chars=20, max_chunk_chars=45, growth=2.0)
+    text = "One, two. Three, four, five, six. Seven, eight, nine, ten, eleven, twelve, thirteen, fourteen."
+
+    # Clause ends are accepted at the target size, which is 20, then 40, then capped at 45
+    assert segment(segmenter, text) == [
+        "One, two.",
+        "Three, four, five, six.",
+        "Seven, eight, nine, ten, eleven, twelve,",
+        "thirteen, fourteen.",
+    ]
+
+
+def test_sentence_ends_are_accepted_at_half_the_target_size():
+    segmenter = TextSegmenter(first_chunk_chars=5, min_chunk_chars=40)
+    text = "First one. Short, yes. A bit longer now. Tail"
+
+    assert segment(segmenter, text) == ["First one.", "Short, yes. A bit longer now.", "Tail"]
+
+
+def test_text_without_boundaries_is_split_at_last_space_beyond_max_chunk_chars():
+    segmenter = TextSegmenter(first_chunk_chars=5, max_chunk_chars=30)
+    text = "word " * 12
+
+    chunks = segment(segmenter, text, piece_size=5)
+
+    assert all(len(chunk) <= 30 for chunk in chunks)
+    assert " ".join(chunks).split() == ["word"] * 12
+    assert len(chunks) > 1
+
+
+def test_flush_resets_first_chunk_policy():
+    segmenter = TextSegmenter(first_chunk_chars=5, min_chunk_chars=100)
+
+    assert segment(segmenter, "Hello there. More text here.") == ["Hello there.", "More text here."]
+    assert segmenter.feed("Again now. ") == ["Again now."]
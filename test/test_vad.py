@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from june_va.vad import EnergyVAD, create_vad
+
+FRAME_SIZE = 720  # 30 ms at 24 kHz
+
+
+def noise(rms: float, seed: int = 0) -> np.ndarray:
+    """
+    A frame of Gaussian noise at the given RMS level.
+    """
+    return np.random.default_rng(seed).normal(0, rms, FRAME_SIZE).astype(np.int16)
+
+
+def test_quiet_frames_are_not_speech():
+    vad = EnergyVAD(24000)
+
+    assert not any(vad.is_speech(noise(50, seed)) for seed in range(20))
+
+
+def test_loud_frames_after_quiet_room_are_speech():
+    vad = EnergyVAD(24000)
+
+    for seed in range(10):
+        vad.is_speech(noise(50, seed))
+
+    assert vad.is_speech(noise(3000, 10))
+
+
+def test_noise_floor_follows_non_speech_frames():
+    vad = EnergyVAD(24000, adaptation=0.5)
+
+    for seed in range(20):
+        vad.is_speech(noise(80, seed))
+
+    assert 60 < vad.noise_floor < 100
+
+
+def test_noise_floor_drops_immediately_when_room_gets_quieter():
+    vad = EnergyVAD(24000)
+
+    for seed in range(10):
+        vad.is_speech(noise(90, seed))
+
+    vad.is_speech(np.zeros(FRAME_SIZE, dtype=np.int16))
+
+    assert vad.noise_floor == 0
+
+
+def test_stationary_noise_step_stops_being_speech():
+    vad = EnergyVAD(24000)
+
+    for seed in range(10):
+        vad.is_speech(noise(50, seed))
+
+    decisions = [vad.is_speech(noise(1000, seed)) for seed in range(10, 300)]
+
+    assert decisions[0]
+    assert not any(decisions[-50:])
+
+
+def test_speech_with_pauses_keeps_noise_floor_low():
+    vad = EnergyVAD(24000)
+
+    for seed in range(10):
+        vad.is_speech(noise(50, seed))
+
+    # Words with short pauses in between
+    decisions = [vad.is_speech(noise(3000 if index % 15 < 12 else 60, index)) for index in range(300)]
+
+    assert sum(decisions) == 240
+    assert vad.noise_floor < 100
+
+
+def test_create_vad_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        create_vad(24000, backend="unknown")